@@ -62,4 +62,7 @@ Main improvements:
 - Job control: Cancellation and reliable deletion
 """
 
-print(__doc__)
+import sys
+
+if __name__ == '__main__':
+    sys.stdout.write(__doc__)
@@ -2,12 +2,111 @@
 Flask Application Initialization
 """
 import os
-import sys
+import atexit
+import multiprocessing
+import queue
+import tempfile
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from flask import Flask, render_template
+from flask import Flask, Request, Response, current_app, render_template
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import TemplateNotFound
+from werkzeug.wsgi import FileWrapper
 from flask_cors import CORS
 from config.config import Config
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+class UploadRequest(Request):
+    """Request that spools uploaded files straight into the upload directory."""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Werkzeug's default keeps parts under 500KB in memory and the rest in the
+        # system temp dir (often RAM-backed tmpfs). The multipart parser already
+        # reads the body in 64KB chunks - write each one to disk next to its target.
+        return tempfile.TemporaryFile(dir=current_app.config['UPLOAD_PATH'])
+    
+    @property
+    def max_content_length(self):
+        """Body size cap: the view's upload_limit config key, else MAX_CONTENT_LENGTH."""
+        # Werkzeug checks this against Content-Length before reading the body,
+        # so oversized uploads are refused with 413 without being spooled
+        view = current_app.view_functions.get(self.endpoint) if self.url_rule else None
+        key = getattr(view, 'upload_limit_key', None)
+        if key is not None:
+            return current_app.config[key]
+        return super().max_content_length
+
+
+# Writable data directories; create_app exposes each as app.config['<KEY>_PATH']
+DATA_DIR_KEYS = ('JOBS', 'STORAGE', 'UPLOAD')
+
+# send_file asks the server's wsgi.file_wrapper for 8KB blocks; files are
+# streamed in blocks of at least this size instead
+FILE_WRAPPER_BLOCK_SIZE = 1024 * 1024
+
+
+def large_block_file_wrapper(wsgi_app, block_size: int = FILE_WRAPPER_BLOCK_SIZE):
+    """
+    WSGI middleware raising the block size used to stream send_file responses.
+    
+    Servers with their own wsgi.file_wrapper keep it; otherwise (the
+    development server) Werkzeug's FileWrapper is used.
+    
+    Args:
+        wsgi_app: WSGI application to wrap
+        block_size: Minimum bytes read per block
+        
+    Returns:
+        Wrapped WSGI application
+    """
+    def app(environ, start_response):
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        environ['wsgi.file_wrapper'] = lambda file, buffer_size=8192: file_wrapper(file, max(buffer_size, block_size))
+        return wsgi_app(environ, start_response)
+    return app
+
+
+def _install_log_queue(logger):
+    """
+    Route a logger's records through a QueueListener thread, once per logger.
+    
+    Flask's app logger is the process-wide "app" logger shared by every app
+    instance, so later create_app calls (tests, the reloader) find the
+    QueueHandler already installed and leave it alone.
+    
+    Args:
+        logger: Logger whose handlers should be fed from a queue
+    """
+    if any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+        return
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, *logger.handlers, respect_handler_level=True)
+    logger.handlers = [QueueHandler(log_queue)]
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider (jsonify, request.get_json) backed by orjson."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 def create_app(config_class=Config):
     """
@@ -19,43 +118,113 @@ def create_app(config_class=Config):
     Returns:
         Configured Flask application
     """
-    # Get the project root directory - handle PyInstaller
-    if getattr(sys, 'frozen', False):
-        # Running in PyInstaller bundle
-        project_root = Path(sys._MEIPASS)
-    else:
-        # Running in normal Python environment
-        project_root = Path(__file__).parent.parent
-    
     # Create Flask app with correct template and static folders
     app = Flask(
         __name__,
-        template_folder=str(project_root / 'templates'),
-        static_folder=str(project_root / 'static')
+        template_folder=str(config_class.BASE_DIR / 'templates'),
+        static_folder=str(config_class.BASE_DIR / 'static')
     )
+    app.request_class = UploadRequest
+    
+    # Route responses already go through orjson (jresp); make Flask's own
+    # JSON handling match when it is installed
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+    app.wsgi_app = large_block_file_wrapper(app.wsgi_app)
     app.config.from_object(config_class)
     
     # Initialize configuration
     config_class.init_app(app)
     
-    # Debug: Print configuration paths
-    print(f"Configuration loaded:")
-    print(f"  BASE_DIR: {config_class.BASE_DIR}")
-    print(f"  JOBS_DIR: {app.config['JOBS_DIR']}")
-    print(f"  STORAGE_DIR: {app.config['STORAGE_DIR']}")
-    print(f"  UPLOAD_DIR: {app.config['UPLOAD_DIR']}")
+    # Extension checks run on every upload - make them frozenset lookups
+    for key in ('ALLOWED_TEMPLATE_EXTENSIONS', 'ALLOWED_DATA_EXTENSIONS'):
+        app.config[key] = frozenset(app.config[key])
+    # AVAILABLE_OUTPUT_FORMATS stays an ordered list for /formats
+    app.config['OUTPUT_FORMAT_SET'] = frozenset(app.config['AVAILABLE_OUTPUT_FORMATS'])
+    
+    # Resolve and create data directories once; request handlers reuse these
+    # Path objects and never mkdir or resolve() on the request path
+    for key in DATA_DIR_KEYS:
+        path = Path(app.config[f'{key}_DIR'])
+        if not os.path.isdir(path):  # One stat on the usual warm start
+            path.mkdir(parents=True, exist_ok=True)
+        app.config[f'{key}_PATH'] = path.resolve()
+    
+    # Debug records are dropped before formatting unless LOG_LEVEL asks for them
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    
+    # Hand log records to a background thread so request threads never block
+    # on stream writes (the stdout/stderr tee in main.py flushes every write)
+    _install_log_queue(app.logger)
+    
+    # Debug: Log configuration paths
+    app.logger.debug("Configuration loaded:")
+    app.logger.debug("  BASE_DIR: %s", config_class.BASE_DIR.absolute())
+    app.logger.debug("  DATA_ROOT: %s", config_class.DATA_ROOT)
+    app.logger.debug("  JOBS_DIR: %s", app.config['JOBS_DIR'])
+    app.logger.debug("  STORAGE_DIR: %s", app.config['STORAGE_DIR'])
+    app.logger.debug("  UPLOAD_DIR: %s", app.config['UPLOAD_DIR'])
+    app.logger.debug("  LOGS_DIR: %s", config_class.LOGS_DIR)
     
     # Enable CORS
-    CORS(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}})
+    CORS(app, resources={r"/api/*": {
+        "origins": app.config['CORS_ORIGINS'],
+        "expose_headers": ["X-Jobs-Queued"]
+    }})
+    
+    # Conversion helpers are only started in the main process - pool workers
+    # re-import the entry module on spawn and must not start their own
+    from services.format_converter import start_libreoffice_listener, LIBREOFFICE_AVAILABLE
+    if multiprocessing.current_process().name == 'MainProcess':
+        # Keep one LibreOffice instance warm instead of spawning soffice per document
+        soffice = start_libreoffice_listener()
+        if soffice is not None:
+            app.extensions['soffice'] = soffice
+            atexit.register(soffice.stop)
+        elif LIBREOFFICE_AVAILABLE:
+            # No UNO bridge: run batched soffice conversions in parallel instead
+            # (capped at 4 workers - each soffice instance is memory-heavy)
+            conversion_pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 4))
+            app.extensions['conversion_pool'] = conversion_pool
+            atexit.register(conversion_pool.shutdown, wait=False, cancel_futures=True)
+    
+    # One background writer group-commits progress logs for all running jobs
+    from services.job_manager import MetadataFlusher
+    metadata_flusher = MetadataFlusher()
+    metadata_flusher.start()
+    app.extensions['metadata_flusher'] = metadata_flusher
+    atexit.register(metadata_flusher.stop)
     
     # Register blueprints
-    from app.routes import api_bp
+    from app.routes import api_bp, jresp
     app.register_blueprint(api_bp)
     
+    # Hide first-job latency: finish imports and connect LibreOffice off the request path
+    if multiprocessing.current_process().name == 'MainProcess':
+        from services.format_converter import start_warmup
+        start_warmup()
+        
+        # Build the job manager (loads every job's metadata) before the first request
+        from app.routes import get_job_manager
+        with app.app_context():
+            get_job_manager()
+    
+    # The SPA shell has no per-request context - render it once, serve the bytes
+    try:
+        with app.test_request_context('/'):
+            index_html = render_template('index.html').encode('utf-8')
+    except TemplateNotFound:
+        index_html = None
+    
+    def index_response():
+        if index_html is None:
+            return render_template('index.html')
+        return Response(index_html, mimetype='text/html')
+    
     # Main route
     @app.route('/')
     def index():
-        return render_template('index.html')
+        return index_response()
     
     # Error handlers
     @app.errorhandler(404)
@@ -63,15 +232,15 @@ def create_app(config_class=Config):
         # Check if this is an API request
         from flask import request
         if request.path.startswith('/api/'):
-            return {'error': 'Not found'}, 404
-        return render_template('index.html')  # SPA fallback
+            return jresp({'error': 'Not found'}, 404)
+        return index_response()  # SPA fallback
     
     @app.errorhandler(500)
     def internal_error(error):
-        return {'error': 'Internal server error'}, 500
+        return jresp({'error': 'Internal server error'}, 500)
     
     @app.errorhandler(413)
     def too_large(error):
-        return {'error': 'File too large'}, 413
+        return jresp({'success': False, 'error': 'File too large'}, 413)
     
     return app
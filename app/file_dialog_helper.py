@@ -0,0 +1,100 @@
+"""
+Native File Dialog Helper
+Shows a tkinter file/directory picker and prints the selected path.
+
+Run as a short-lived subprocess by the browse endpoints so tkinter's event
+loop never runs inside a server worker thread:
+
+    python file_dialog_helper.py file template
+    python file_dialog_helper.py directory
+"""
+import sys
+
+TEMPLATE_FILETYPES = (
+    ('All Template Files', '*.docx *.xlsx *.msg'),
+    ('Word Documents', '*.docx'),
+    ('Excel Files', '*.xlsx'),
+    ('Outlook Messages', '*.msg'),
+    ('All Files', '*.*')
+)
+
+DATA_FILETYPES = (
+    ('Excel Files', '*.xlsx *.xls'),
+    ('All Files', '*.*')
+)
+
+
+def webview_file_types(file_type: str = 'template') -> tuple:
+    """
+    The file type filters in pywebview's create_file_dialog format.
+    
+    Args:
+        file_type: 'template' or 'data'
+        
+    Returns:
+        Tuple of 'Description (*.ext;*.ext)' strings
+    """
+    filetypes = TEMPLATE_FILETYPES if file_type == 'template' else DATA_FILETYPES
+    return tuple(f"{name} ({';'.join(patterns.split())})" for name, patterns in filetypes)
+
+
+def _hidden_root():
+    """Create a hidden, topmost Tk root for the dialog to attach to."""
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    root.attributes('-topmost', True)
+    return root
+
+
+def ask_file(file_type: str = 'template') -> str:
+    """
+    Open a file picker.
+
+    Args:
+        file_type: 'template' or 'data'; selects the file type filters
+
+    Returns:
+        Selected path, or '' if the dialog was cancelled
+    """
+    from tkinter import filedialog
+    root = _hidden_root()
+    try:
+        return filedialog.askopenfilename(
+            title=f'Select {file_type} file',
+            filetypes=TEMPLATE_FILETYPES if file_type == 'template' else DATA_FILETYPES
+        )
+    finally:
+        root.destroy()
+
+
+def ask_directory() -> str:
+    """
+    Open a directory picker.
+
+    Returns:
+        Selected directory, or '' if the dialog was cancelled
+    """
+    from tkinter import filedialog
+    root = _hidden_root()
+    try:
+        return filedialog.askdirectory(title='Select output directory')
+    finally:
+        root.destroy()
+
+
+def main(argv) -> int:
+    """Write the selected path to stdout as UTF-8; exit code 1 on bad arguments."""
+    if not argv or argv[0] not in ('file', 'directory'):
+        print("usage: file_dialog_helper.py file [template|data] | directory", file=sys.stderr)
+        return 1
+    if argv[0] == 'file':
+        path = ask_file(argv[1] if len(argv) > 1 else 'template')
+    else:
+        path = ask_directory()
+    sys.stdout.buffer.write((path or '').encode('utf-8'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -3,58 +3,544 @@ API Routes
 Handles all API endpoints for the document automation system.
 """
 import os
-import json
-from flask import Blueprint, request, jsonify, send_file, current_app
+import sys
+import hashlib
+import subprocess
+import atexit
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+from flask import Blueprint, request, send_file, current_app
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+from werkzeug.exceptions import RequestEntityTooLarge
 from pathlib import Path
+from urllib.parse import quote, unquote
 import threading
+import time
 
-from services.job_manager import JobManager
-from models.job import JobStatus
+from services.job_manager import JobManager, stream_zip_archive
+from utils.helpers import dump_json, load_json
+from services.format_converter import terminate_process
+from services.document_parser import DocumentParser
+from utils.file_handlers import copy_files
+from app import file_dialog_helper
+from models.job import Job, JobStatus, TERMINAL_STATUSES
 
 # Create blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# Initialize job manager (will be set in create_app)
-job_manager = None
+# DocumentParser holds no state - one instance serves every request
+_parser = DocumentParser()
+
+# Guards lazy creation of the app's JobManager (create_app normally builds it)
+_job_manager_lock = threading.Lock()
 
 
 def get_job_manager():
-    """Get or create job manager instance."""
-    global job_manager
-    if job_manager is None:
-        print(f"Creating JobManager with:")
-        print(f"  jobs_dir: {current_app.config['JOBS_DIR']}")
-        print(f"  storage_dir: {current_app.config['STORAGE_DIR']}")
-        job_manager = JobManager(
-            jobs_dir=current_app.config['JOBS_DIR'],
-            storage_dir=current_app.config['STORAGE_DIR']
-        )
-    return job_manager
+    """Get the current app's job manager, creating it on first use."""
+    extensions = current_app.extensions
+    manager = extensions.get('job_manager')
+    if manager is None:
+        # Concurrent first requests must not each build (and rescan) a manager
+        with _job_manager_lock:
+            manager = extensions.get('job_manager')
+            if manager is None:
+                manager = JobManager(
+                    jobs_dir=current_app.config['JOBS_PATH'],
+                    storage_dir=current_app.config['STORAGE_PATH'],
+                    metadata_flusher=extensions.get('metadata_flusher'),
+                    conversion_pool=extensions.get('conversion_pool')
+                )
+                extensions['job_manager'] = manager
+    return manager
+
+
+# Dashboard stats are aggregated over every job - recompute at most this often
+STATS_CACHE_TTL = 5.0
+
+# Longest a /jobs/<id>/wait long-poll blocks before answering unchanged
+JOB_WAIT_TIMEOUT = 25.0
+
+
+class _RouteCaches:
+    """Response caches for one app's JobManager, kept in app.extensions['route_caches']."""
+    
+    def __init__(self):
+        # Serialized GET /jobs body, reused until a route mutates jobs or a running
+        # job moves its updated_at (workers update progress without going through routes).
+        # 'built_at' lets ?ttl_ms= pollers skip even the updated_at scan
+        self.jobs = {'token': None, 'body': None, 'built_at': 0.0}
+        self.jobs_version = 0
+        self.lock = threading.Lock()
+        self.stats = {'expires': 0.0, 'body': None}
+        # Input path -> monotonic time it was last seen to exist
+        self.path_exists = {}
+
+
+@api_bp.record
+def _init_app_state(state):
+    """Give each app its own job worker pool and response caches."""
+    app = state.app
+    # Jobs run on a bounded worker pool; bursts of submissions queue instead of
+    # each spawning its own thread
+    executor = ThreadPoolExecutor(max_workers=app.config['MAX_CONCURRENT_JOBS'], thread_name_prefix='jobproc')
+    atexit.register(executor.shutdown, wait=False)
+    app.extensions['job_executor'] = executor
+    app.extensions['route_caches'] = _RouteCaches()
+
+
+def _caches() -> _RouteCaches:
+    """Response caches of the current app."""
+    return current_app.extensions['route_caches']
+
+
+def _start_job(manager, job):
+    """
+    Queue a job for background processing.
+    
+    Args:
+        manager: JobManager owning the job
+        job: Job to process; gets a fresh cancel event and its worker future
+    """
+    job._cancel_event = threading.Event()
+    job._thread = current_app.extensions['job_executor'].submit(manager.process_job, job.id)
+
+
+def _queued_job_count():
+    """Number of submitted jobs still waiting for a free worker."""
+    return current_app.extensions['job_executor']._work_queue.qsize()
+
+
+def _invalidate_jobs_cache():
+    """Bump the jobs version so the next GET /jobs rebuilds its response."""
+    caches = _caches()
+    with caches.lock:
+        caches.jobs_version += 1
+    caches.stats['expires'] = 0.0
+
+
+def _job_json(job, jobs_version):
+    """
+    Serialized job.to_dict(), reused until the job's updated_at moves.
+    
+    The key also carries the app's jobs version, so edits made by routes that
+    do not touch updated_at still re-serialize.
+    """
+    key = (job.updated_at, jobs_version)
+    cached = job._json_cache
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    body = dump_json(job.to_dict())
+    job._json_cache = (key, body)
+    return body
+
+
+def _json_body(body: bytes, status: int = 200):
+    """Wrap pre-serialized JSON bytes in a response."""
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+def jresp(obj, status: int = 200):
+    """
+    Build a JSON response, serialized with orjson when installed.
+    
+    Args:
+        obj: JSON-serializable payload
+        status: HTTP status code
+        
+    Returns:
+        Flask response
+    """
+    return _json_body(dump_json(obj), status)
+
+
+# Preview content types by output extension
+_MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.msg': 'application/vnd.ms-outlook'
+}
+_DEFAULT_MIME_TYPE = 'application/octet-stream'
+
+# Uploads are copied to their destination in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Multi-file uploads are written to disk by up to this many threads at once
+UPLOAD_SAVE_WORKERS = 4
+
+
+def _stream_fileno(stream):
+    """Return the OS file descriptor behind an upload stream, or None if it has none."""
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _sendfile_copy(dst_fd, src_fd, offset, count):
+    """Copy count bytes from src_fd at offset into dst_fd inside the kernel."""
+    while count > 0:
+        sent = os.sendfile(dst_fd, src_fd, offset, count)
+        if sent == 0:
+            break
+        offset += sent
+        count -= sent
+
+
+def _stream_to_path(file_storage, dest, chunk: int = UPLOAD_CHUNK_SIZE):
+    """
+    Write an uploaded file to disk in fixed-size chunks, hashing it on the way.
+    
+    If dest already holds the same bytes (known from an earlier upload) it is
+    left untouched, so re-submitting a template doesn't rewrite it and the
+    file tracker doesn't have to re-read it to hash it.
+    
+    Uploads spooled to a real file (see UploadRequest) are hashed through one
+    reused buffer and copied with os.sendfile where available, so the payload
+    is never written back out from Python.
+    
+    Args:
+        file_storage: Werkzeug FileStorage from request.files
+        dest: Destination path
+        chunk: Bytes read and written per iteration
+    """
+    stream = file_storage.stream
+    src_fd = _stream_fileno(stream)
+    if src_fd is not None and hasattr(os, 'posix_fadvise'):
+        # The spooled upload is read once, front to back
+        try:
+            os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+    
+    tracker = get_job_manager().file_tracker
+    digest = hashlib.sha256()
+    # Per-thread temp name: concurrent saves of the same name must not share it
+    part = f"{dest}.{threading.get_ident()}.part"
+    
+    if src_fd is not None and hasattr(os, 'sendfile'):
+        start = stream.tell()
+        buf = bytearray(chunk)
+        view = memoryview(buf)
+        while n := stream.readinto(buf):
+            digest.update(view[:n])
+        end = stream.tell()
+        sha256 = digest.hexdigest()
+        if tracker.get_cached_hash(dest) == sha256:
+            return
+        try:
+            with open(part, 'wb', buffering=0) as f:
+                _sendfile_copy(f.fileno(), src_fd, start, end - start)
+        except BaseException:
+            # open() may have failed before part existed - keep the real error
+            Path(part).unlink(missing_ok=True)
+            raise
+    else:
+        try:
+            with open(part, 'wb', buffering=0) as f:
+                while buf := stream.read(chunk):
+                    digest.update(buf)
+                    f.write(buf)
+        except BaseException:
+            Path(part).unlink(missing_ok=True)
+            raise
+        sha256 = digest.hexdigest()
+        if tracker.get_cached_hash(dest) == sha256:
+            os.unlink(part)
+            return
+    
+    os.replace(part, dest)
+    tracker.record_hash(dest, sha256)
+
+
+# Existence of user-supplied input paths; hits are trusted this long, misses
+# are always re-checked so a file created a moment ago is found
+PATH_EXISTS_TTL = 5.0
+PATH_EXISTS_CACHE_SIZE = 512
+
+
+def _path_exists(path) -> bool:
+    """
+    os.path.exists for input paths sent by clients, with positive results cached.
+    
+    Args:
+        path: Path to check
+        
+    Returns:
+        True if the path exists
+    """
+    now = time.monotonic()
+    exists_cache = _caches().path_exists
+    checked_at = exists_cache.get(path)
+    if checked_at is not None and now - checked_at < PATH_EXISTS_TTL:
+        return True
+    if not os.path.exists(path):
+        exists_cache.pop(path, None)
+        return False
+    if len(exists_cache) >= PATH_EXISTS_CACHE_SIZE:
+        exists_cache.clear()
+    exists_cache[path] = now
+    return True
+
+
+def _safe_size(path):
+    """Size of a file in bytes from a single stat call, or None if it is missing."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _scan_file_sizes(directory):
+    """
+    Map file names to sizes for one directory using os.scandir.
+    
+    Args:
+        directory: Directory to scan
+        
+    Returns:
+        Dict of {file name: size in bytes}; empty if the directory is unreadable
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name: entry.stat().st_size for entry in entries if entry.is_file()}
+    except OSError:
+        return {}
+
+
+def _accel_redirect(path, mimetype, download_name=None):
+    """
+    Hand a job file to nginx via X-Accel-Redirect.
+    
+    Only used when X_ACCEL_JOBS_PREFIX is configured and path lies inside
+    the jobs directory; nginx then serves the bytes (including Range and
+    conditional requests) and the worker returns immediately.
+    
+    Args:
+        path: File to serve
+        mimetype: Content-Type for the response
+        download_name: If set, served as an attachment with this name
+        
+    Returns:
+        Empty redirect response, or None to serve the file normally
+    """
+    cfg = current_app.config
+    prefix = cfg.get('X_ACCEL_JOBS_PREFIX')
+    if not prefix:
+        return None
+    try:
+        rel = Path(path).resolve().relative_to(cfg['JOBS_PATH'])
+    except ValueError:
+        return None  # Custom output directory outside the jobs tree
+    
+    response = current_app.response_class(mimetype=mimetype)
+    response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(rel.as_posix())
+    if download_name:
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response
+
+
+# Outside the desktop app, native dialogs run in a helper process so tkinter
+# never blocks a worker thread
+_DIALOG_HELPER = str(Path(__file__).with_name('file_dialog_helper.py'))
+DIALOG_TIMEOUT = 300
+
+
+def _dialog_available():
+    """Check whether a native dialog can be shown (Linux servers often have no display)."""
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+
+def _run_file_dialog(kind, file_type='template'):
+    """
+    Show a native file or directory dialog.
+    
+    Args:
+        kind: 'file' or 'directory'
+        file_type: 'template' or 'data' (file dialogs only)
+        
+    Returns:
+        Selected path, or '' if the user cancelled
+    """
+    # Desktop app: the pywebview window already owns a GUI thread - ask it
+    # for the dialog instead of starting Tk
+    webview = sys.modules.get('webview')
+    if webview is not None and getattr(webview, 'windows', None):
+        window = webview.windows[0]
+        if kind == 'file':
+            result = window.create_file_dialog(webview.OPEN_DIALOG, file_types=file_dialog_helper.webview_file_types(file_type))
+        else:
+            result = window.create_file_dialog(webview.FOLDER_DIALOG)
+        if isinstance(result, (tuple, list)):
+            result = result[0] if result else None
+        return result or ''
+    
+    if getattr(sys, 'frozen', False):
+        # The bundle ships without tkinter and has no interpreter to run the
+        # helper script with - its dialogs always come from the window
+        raise RuntimeError('application window is not open')
+    
+    result = subprocess.run(
+        [sys.executable, _DIALOG_HELPER, kind, file_type],
+        capture_output=True,
+        timeout=DIALOG_TIMEOUT,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or 'dialog helper failed')
+    return result.stdout.decode('utf-8')
+
+
+def _suffix(path: str) -> str:
+    """Return the extension of path ('' if none), as Path(path).suffix would."""
+    start = max(path.rfind('/'), path.rfind('\\')) + 1
+    i = path.rfind('.')
+    return path[i:] if start < i < len(path) - 1 else ''
 
 
 def allowed_file(filename, allowed_extensions):
     """Check if file has allowed extension."""
-    return Path(filename).suffix.lower() in allowed_extensions
+    i = filename.rfind('.')
+    return i >= 0 and filename[i:].lower() in allowed_extensions
+
+
+# Inputs accepted by the split and merge endpoints
+SPLIT_MERGE_EXTENSIONS = frozenset({'.pdf', '.docx', '.doc'})
+NAMES_FILE_EXTENSIONS = frozenset({'.xlsx', '.xls', '.txt'})
+
+
+def upload_limit(config_key):
+    """
+    Decorator: cap the view's request body at app.config[config_key]
+    instead of MAX_CONTENT_LENGTH (enforced by UploadRequest).
+    
+    Args:
+        config_key: Name of the config value holding the limit in bytes
+    """
+    def decorator(view):
+        view.upload_limit_key = config_key
+        return view
+    return decorator
+
+
+def _save_upload(file_storage, prefix=''):
+    """
+    Stream an uploaded file into the upload directory under its secured name.
+    
+    Args:
+        file_storage: Werkzeug FileStorage with a filename
+        prefix: Optional prefix for the stored filename
+        
+    Returns:
+        Path of the saved file
+    """
+    path = current_app.config['UPLOAD_PATH'] / f"{prefix}{secure_filename(file_storage.filename)}"
+    _stream_to_path(file_storage, path)
+    return path
+
+
+def _save_uploads(file_storages):
+    """
+    Save several uploads concurrently so their disk writes overlap.
+    
+    Args:
+        file_storages: List of FileStorage objects with filenames
+        
+    Returns:
+        Saved paths, in the same order as file_storages
+    """
+    if len(file_storages) < 2:
+        return [_save_upload(f) for f in file_storages]
+    
+    app = current_app._get_current_object()
+    
+    def save(file_storage):
+        with app.app_context():
+            return _save_upload(file_storage)
+    
+    with ThreadPoolExecutor(max_workers=min(len(file_storages), UPLOAD_SAVE_WORKERS)) as pool:
+        return list(pool.map(save, file_storages))
+
+
+def _accept_upload(files, field, allowed_extensions):
+    """
+    Validate and save one optional file field of a multipart request.
+    
+    Args:
+        files: request.files
+        field: Form field name
+        allowed_extensions: Set of accepted lower-case extensions
+        
+    Returns:
+        (path, valid): path is None if the field is missing or empty;
+        valid is False if the file's extension is not allowed (nothing saved)
+    """
+    file_storage = files.get(field)
+    if not file_storage or not file_storage.filename:
+        return None, True
+    if not allowed_file(file_storage.filename, allowed_extensions):
+        return None, False
+    return _save_upload(file_storage), True
 
 
 @api_bp.route('/jobs', methods=['GET'])
 def get_jobs():
-    """Get all jobs."""
+    """
+    Get all jobs.
+    
+    ?ttl_ms=N accepts a cached listing up to N ms old as long as no route has
+    modified jobs since; progress of running jobs may then lag by up to N ms.
+    """
     try:
+        # Queue depth changes without touching any job, so it travels in a
+        # header rather than in the cached body
+        queued = {'X-Jobs-Queued': str(_queued_job_count())}
+        
+        caches = _caches()
+        jobs_cache, jobs_version = caches.jobs, caches.jobs_version
+        ttl_ms = request.args.get('ttl_ms', 0, type=int)
+        if ttl_ms > 0 and jobs_cache['body'] is not None:
+            if (jobs_cache['token'][0] == jobs_version
+                    and time.monotonic() - jobs_cache['built_at'] < ttl_ms / 1000.0):
+                response = _json_body(jobs_cache['body'])
+                response.headers.update(queued)
+                return response
+        
         manager = get_job_manager()
         jobs = manager.get_all_jobs()
         
+        token = (jobs_version, len(jobs), max((job.updated_at for job in jobs), default=None))
+        if jobs_cache['token'] == token:
+            jobs_cache['built_at'] = time.monotonic()  # Confirmed current
+            response = _json_body(jobs_cache['body'])
+            response.headers.update(queued)
+            return response
+        
         # Sort by creation date (newest first)
         jobs.sort(key=lambda x: x.created_at, reverse=True)
         
-        return jsonify({
-            'success': True,
-            'jobs': [job.to_dict() for job in jobs],
-            'count': len(jobs)
-        })
+        def generate():
+            # Encode one job at a time so the first bytes go out immediately;
+            # the chunks are kept to fill the cache once the list is complete
+            chunks = [b'{"success":true,"count":%d,"jobs":[' % len(jobs)]
+            yield chunks[0]
+            for i, job in enumerate(jobs):
+                chunk = _job_json(job, jobs_version)
+                if i:
+                    chunk = b',' + chunk
+                chunks.append(chunk)
+                yield chunk
+            chunks.append(b']}')
+            yield chunks[-1]
+            # Stamped after the build so the TTL counts from a complete snapshot
+            jobs_cache['token'], jobs_cache['body'] = token, b''.join(chunks)
+            jobs_cache['built_at'] = time.monotonic()
+        
+        return current_app.response_class(generate(), mimetype='application/json', headers=queued)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>', methods=['GET'])
@@ -65,14 +551,14 @@ def get_job(job_id):
         job = manager.get_job(job_id)
         
         if not job:
-            return jsonify({'success': False, 'error': 'Job not found'}), 404
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
         # Add validation warnings
         warnings = []
         if job.status == JobStatus.COMPLETED:
             # Check if ZIP file exists
             if job.zip_file_path:
-                if not os.path.exists(job.zip_file_path):
+                if not _path_exists(job.zip_file_path):
                     warnings.append('Output ZIP file is missing')
             else:
                 warnings.append('ZIP file path not set')
@@ -81,206 +567,248 @@ def get_job(job_id):
             if not job.output_files:
                 warnings.append('No output files recorded')
         
-        job_dict = job.to_dict()
+        # Polled by the UI - splice the memoized job JSON instead of
+        # re-serializing to_dict() on every hit
+        job_body = _job_json(job, _caches().jobs_version)
         if warnings:
-            job_dict['warnings'] = warnings
+            job_body = job_body[:-1] + b',"warnings":' + dump_json(warnings) + b'}'
+        return _json_body(b'{"success":true,"job":' + job_body + b'}')
+    except Exception as e:
+        return jresp({'success': False, 'error': str(e)}, 500)
+
+
+@api_bp.route('/jobs/<job_id>/wait', methods=['GET'])
+def wait_job(job_id):
+    """
+    Long-poll a job until it changes.
+    
+    Blocks until the job's change token differs from ?token=, or for at most
+    ?timeout= seconds (capped at JOB_WAIT_TIMEOUT). Without a token the
+    current state is returned immediately; pass the returned token back to
+    wait for the next change.
+    """
+    try:
+        manager = get_job_manager()
+        if not manager.get_job(job_id):
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
-        return jsonify({
-            'success': True,
-            'job': job_dict
-        })
+        token = request.args.get('token', type=int)
+        if token is None:
+            token = manager.get_job_version(job_id)
+        else:
+            timeout = min(request.args.get('timeout', JOB_WAIT_TIMEOUT, type=float), JOB_WAIT_TIMEOUT)
+            token = manager.wait_for_job_change(job_id, token, max(timeout, 0.0))
+        
+        job = manager.get_job(job_id)
+        if not job:
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
+        
+        return _json_body(b'{"success":true,"token":%d,"job":' % token + _job_json(job, _caches().jobs_version) + b'}')
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/upload-temp-file', methods=['POST'])
 def upload_temp_file():
-    """Upload a temporary file and return its path."""
+    """
+    Upload a temporary file and return its path.
+    
+    Multipart form upload; clients that can send the raw bytes should use
+    /upload-raw, which skips multipart decoding entirely.
+    """
     try:
-        if 'template_file' not in request.files:
-            return jsonify({'success': False, 'error': 'No file provided'}), 400
+        files = request.files
+        if 'template_file' not in files:
+            return jresp({'success': False, 'error': 'No file provided'}, 400)
         
-        file = request.files['template_file']
+        file = files['template_file']
         if not file or not file.filename:
-            return jsonify({'success': False, 'error': 'No file selected'}), 400
+            return jresp({'success': False, 'error': 'No file selected'}, 400)
         
-        from werkzeug.utils import secure_filename
-        filename = secure_filename(file.filename)
-        upload_dir = Path(current_app.config['UPLOAD_DIR'])
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        file_path = upload_dir / filename
-        file.save(str(file_path))
+        file_path = _save_upload(file)
         
-        return jsonify({
+        return jresp({
             'success': True,
             'path': str(file_path)
         })
         
+    except RequestEntityTooLarge:
+        raise  # Answered by the app's 413 handler
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
+
+
+@api_bp.route('/upload-raw', methods=['POST'])
+def upload_raw_file():
+    """
+    Upload a file sent as the raw request body and return its path.
+    
+    The body (application/octet-stream) is copied from request.stream to
+    the upload directory as it arrives; the file name comes from the
+    X-Filename header (URL-encoded if it is not ASCII).
+    """
+    try:
+        filename = secure_filename(unquote(request.headers.get('X-Filename', '')))
+        if not filename:
+            return jresp({'success': False, 'error': 'X-Filename header required'}, 400)
+        
+        file_path = current_app.config['UPLOAD_PATH'] / filename
+        stream = request.stream
+        try:
+            with open(file_path, 'wb', buffering=0) as f:
+                while buf := stream.read(UPLOAD_CHUNK_SIZE):
+                    f.write(buf)
+        except BaseException:
+            # Don't leave a truncated upload behind
+            file_path.unlink(missing_ok=True)
+            raise
+        
+        return jresp({
+            'success': True,
+            'path': str(file_path)
+        })
+        
+    except RequestEntityTooLarge:
+        raise  # Answered by the app's 413 handler
+    except Exception as e:
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/excel/sheets', methods=['POST'])
 def get_excel_sheets():
     """Get list of sheets from an Excel file."""
     try:
-        from services.document_parser import DocumentParser
-        parser = DocumentParser()
-        
+        form = request.form
+        files = request.files
         file_path = None
-        is_template = request.form.get('is_template', 'false').lower() == 'true'
+        is_template = form.get('is_template', 'false').lower() == 'true'
         
         # Handle file upload
-        if 'file' in request.files:
-            file = request.files['file']
-            if file and file.filename:
-                from werkzeug.utils import secure_filename
-                filename = secure_filename(file.filename)
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                file_path = upload_dir / f"temp_{filename}"
-                file.save(str(file_path))
+        file = files.get('file')
+        if file and file.filename:
+            file_path = _save_upload(file, prefix='temp_')
+        uploaded = file_path is not None
         
         # Handle file path
-        if not file_path and request.form.get('file_path'):
-            file_path = request.form.get('file_path')
+        if not file_path:
+            file_path = form.get('file_path')
         
-        if not file_path or not os.path.exists(file_path):
-            return jsonify({'success': False, 'error': 'File not found'}), 400
+        if not file_path or (not uploaded and not _path_exists(file_path)):
+            return jresp({'success': False, 'error': 'File not found'}, 400)
         
-        # Get sheets
-        sheets = parser.get_excel_sheets(str(file_path))
-        
-        # Detect sheet with ##variable## or ##placeholder##
-        if is_template:
-            detected_sheet = parser.detect_template_sheet(str(file_path))
-        else:
-            detected_sheet = parser.detect_data_sheet(str(file_path))
+        # Get sheets and detect the one with ##variable## or ##placeholder##
+        sheets, detected_sheet = _parser.get_sheets_and_detect(str(file_path), is_template)
         
         # Clean up temp file if uploaded
-        if 'file' in request.files and file_path and os.path.exists(file_path):
+        if uploaded and os.path.exists(file_path):
             try:
                 os.remove(file_path)
             except:
                 pass
         
-        return jsonify({
+        return jresp({
             'success': True,
             'sheets': sheets,
             'detected_sheet': detected_sheet
         })
         
+    except RequestEntityTooLarge:
+        raise  # Answered by the app's 413 handler
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs', methods=['POST'])
 def create_job():
     """Create a new job."""
     try:
+        form = request.form
+        files = request.files
+        cfg = current_app.config
         manager = get_job_manager()
         
         # Check if files are uploaded or paths provided
-        template_path = None
-        data_path = None
-        
-        # Handle file uploads
-        if 'template_file' in request.files:
-            template_file = request.files['template_file']
-            if template_file and template_file.filename:
-                if not allowed_file(template_file.filename, current_app.config['ALLOWED_TEMPLATE_EXTENSIONS']):
-                    return jsonify({'success': False, 'error': 'Invalid template file format'}), 400
-                
-                filename = secure_filename(template_file.filename)
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                template_path = upload_dir / filename
-                template_file.save(str(template_path))
-        
-        if 'data_file' in request.files:
-            data_file = request.files['data_file']
-            if data_file and data_file.filename:
-                if not allowed_file(data_file.filename, current_app.config['ALLOWED_DATA_EXTENSIONS']):
-                    return jsonify({'success': False, 'error': 'Invalid data file format'}), 400
-                
-                filename = secure_filename(data_file.filename)
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                data_path = upload_dir / filename
-                data_file.save(str(data_path))
+        template_path, valid = _accept_upload(files, 'template_file', cfg['ALLOWED_TEMPLATE_EXTENSIONS'])
+        if not valid:
+            return jresp({'success': False, 'error': 'Invalid template file format'}, 400)
+        
+        data_path, valid = _accept_upload(files, 'data_file', cfg['ALLOWED_DATA_EXTENSIONS'])
+        if not valid:
+            return jresp({'success': False, 'error': 'Invalid data file format'}, 400)
         
         # Handle file paths (if files not uploaded)
-        if not template_path and request.form.get('template_path'):
-            template_path = request.form.get('template_path')
-            if not os.path.exists(template_path):
-                return jsonify({'success': False, 'error': 'Template file not found'}), 400
+        if not template_path:
+            template_path = form.get('template_path')
+            if template_path and not _path_exists(template_path):
+                return jresp({'success': False, 'error': 'Template file not found'}, 400)
         
-        if not data_path and request.form.get('data_path'):
-            data_path = request.form.get('data_path')
-            if not os.path.exists(data_path):
-                return jsonify({'success': False, 'error': 'Data file not found'}), 400
+        if not data_path:
+            data_path = form.get('data_path')
+            if data_path and not _path_exists(data_path):
+                return jresp({'success': False, 'error': 'Data file not found'}, 400)
         
         # Check if using multi-template mode
-        templates_json = request.form.get('templates', None)
+        templates_json = form.get('templates', None)
         templates = None
         if templates_json:
-            print(f"Received templates JSON: {templates_json}")
             try:
-                templates = json.loads(templates_json)
-                print(f"Parsed templates: {templates}")
+                templates = load_json(templates_json)
             except Exception as e:
-                print(f"Error parsing templates JSON: {str(e)}")
-                return jsonify({'success': False, 'error': f'Invalid templates JSON: {str(e)}'}), 400
+                current_app.logger.warning("Invalid templates JSON: %s", e)
+                return jresp({'success': False, 'error': f'Invalid templates JSON: {str(e)}'}, 400)
         
         # Validate inputs
         # In multi-template mode, templates list is used instead of template_path
         if templates:
             if not templates or len(templates) == 0:
-                return jsonify({'success': False, 'error': 'At least one template is required'}), 400
+                return jresp({'success': False, 'error': 'At least one template is required'}, 400)
             if not data_path:
-                return jsonify({'success': False, 'error': 'Data file is required'}), 400
+                return jresp({'success': False, 'error': 'Data file is required'}, 400)
         else:
             if not template_path or not data_path:
-                return jsonify({'success': False, 'error': 'Both template and data files are required'}), 400
+                return jresp({'success': False, 'error': 'Both template and data files are required'}, 400)
         
         # Get output formats
-        output_formats = request.form.get('output_formats', 'pdf')
+        output_formats = form.get('output_formats', 'pdf')
         if isinstance(output_formats, str):
             output_formats = [f.strip() for f in output_formats.split(',')]
         
         # Validate output formats
-        for fmt in output_formats:
-            if fmt not in current_app.config['AVAILABLE_OUTPUT_FORMATS']:
-                return jsonify({'success': False, 'error': f'Invalid output format: {fmt}'}), 400
+        invalid = set(output_formats) - cfg['OUTPUT_FORMAT_SET']
+        if invalid:
+            fmt = next(f for f in output_formats if f in invalid)
+            return jresp({'success': False, 'error': f'Invalid output format: {fmt}'}, 400)
         
         # Get Excel print settings if provided
         excel_print_settings = None
-        if request.form.get('excel_print_settings'):
+        raw = form.get('excel_print_settings')
+        if raw:
             try:
-                excel_print_settings = json.loads(request.form.get('excel_print_settings'))
+                excel_print_settings = load_json(raw)
             except:
                 pass
         
         # Get Excel auto-adjust options if provided
         excel_auto_adjust_options = None
-        if request.form.get('excel_auto_adjust_options'):
+        raw = form.get('excel_auto_adjust_options')
+        if raw:
             try:
-                excel_auto_adjust_options = json.loads(request.form.get('excel_auto_adjust_options'))
+                excel_auto_adjust_options = load_json(raw)
             except:
                 pass
         
         # Get filename variable if provided
-        filename_variable = request.form.get('filename_variable', '##filename##').strip()
+        filename_variable = form.get('filename_variable', '##filename##').strip()
         
         # Get tabname variable if provided
-        tabname_variable = request.form.get('tabname_variable', '##tabname##').strip()
+        tabname_variable = form.get('tabname_variable', '##tabname##').strip()
         
         # Get sheet names if provided (for Excel files with multiple sheets)
-        data_sheet = request.form.get('data_sheet', '').strip() or None
-        template_sheet = request.form.get('template_sheet', '').strip() or None
+        data_sheet = form.get('data_sheet', '').strip() or None
+        template_sheet = form.get('template_sheet', '').strip() or None
         
         # Get output directory if provided
-        output_directory = request.form.get('output_directory', '').strip()
+        output_directory = form.get('output_directory', '').strip()
         if output_directory and not os.path.exists(output_directory):
             try:
                 os.makedirs(output_directory, exist_ok=True)
@@ -302,86 +830,66 @@ def create_job():
             templates=templates
         )
         
-        # Start processing in background thread
-        auto_process = request.form.get('auto_process', 'true').lower() == 'true'
+        # Start processing in background worker
+        auto_process = form.get('auto_process', 'true').lower() == 'true'
         if auto_process:
-            import threading
-            job._cancel_event = threading.Event()
-            thread = threading.Thread(target=manager.process_job, args=(job.id,))
-            thread.daemon = False  # Changed from True to allow joining
-            job._thread = thread
-            thread.start()
-        
-        return jsonify({
+            _start_job(manager, job)
+        
+        _invalidate_jobs_cache()
+        
+        return jresp({
             'success': True,
             'job': job.to_dict(),
             'message': 'Job created successfully'
-        }), 201
+        }, 201)
         
+    except RequestEntityTooLarge:
+        raise  # Answered by the app's 413 handler
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/split-jobs', methods=['POST'])
 def create_split_job():
     """Create a new split job."""
     try:
+        form = request.form
+        files = request.files
         manager = get_job_manager()
         
         # Handle file upload
-        input_file_path = None
-        names_file_path = None
-        
-        if 'input_file' in request.files:
-            input_file = request.files['input_file']
-            if input_file and input_file.filename:
-                ext = Path(input_file.filename).suffix.lower()
-                if ext not in ['.pdf', '.docx', '.doc']:
-                    return jsonify({'success': False, 'error': 'Invalid file format. Only PDF and Word files supported.'}), 400
-                
-                filename = secure_filename(input_file.filename)
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                input_file_path = upload_dir / filename
-                input_file.save(str(input_file_path))
-        
-        if 'names_file' in request.files:
-            names_file = request.files['names_file']
-            if names_file and names_file.filename:
-                ext = Path(names_file.filename).suffix.lower()
-                if ext not in ['.xlsx', '.xls', '.txt']:
-                    return jsonify({'success': False, 'error': 'Invalid names file format. Only Excel and TXT supported.'}), 400
-                
-                filename = secure_filename(names_file.filename)
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                names_file_path = upload_dir / filename
-                names_file.save(str(names_file_path))
+        input_file_path, valid = _accept_upload(files, 'input_file', SPLIT_MERGE_EXTENSIONS)
+        if not valid:
+            return jresp({'success': False, 'error': 'Invalid file format. Only PDF and Word files supported.'}, 400)
+        
+        names_file_path, valid = _accept_upload(files, 'names_file', NAMES_FILE_EXTENSIONS)
+        if not valid:
+            return jresp({'success': False, 'error': 'Invalid names file format. Only Excel and TXT supported.'}, 400)
         
         # Handle path (if file not uploaded)
-        if not input_file_path and request.form.get('input_path'):
-            input_file_path = request.form.get('input_path')
-            if not os.path.exists(input_file_path):
-                return jsonify({'success': False, 'error': 'Input file not found'}), 400
+        if not input_file_path and form.get('input_path'):
+            input_file_path = form.get('input_path')
+            if not _path_exists(input_file_path):
+                return jresp({'success': False, 'error': 'Input file not found'}, 400)
         
-        if not names_file_path and request.form.get('names_path'):
-            names_file_path = request.form.get('names_path')
+        if not names_file_path and form.get('names_path'):
+            names_file_path = form.get('names_path')
         
         # Validate input
         if not input_file_path:
-            return jsonify({'success': False, 'error': 'Input file is required'}), 400
+            return jresp({'success': False, 'error': 'Input file is required'}, 400)
         
         # Get split configuration
-        split_type = request.form.get('split_type', 'by_count')
-        pages_per_split = int(request.form.get('pages_per_split', 1))
+        split_type = form.get('split_type', 'by_count')
+        pages_per_split = int(form.get('pages_per_split', 1))
         
         if pages_per_split <= 0:
-            return jsonify({'success': False, 'error': 'pages_per_split must be greater than 0'}), 400
+            return jresp({'success': False, 'error': 'pages_per_split must be greater than 0'}, 400)
         
         if split_type == 'by_names' and not names_file_path:
-            return jsonify({'success': False, 'error': 'Names file is required for split by names'}), 400
+            return jresp({'success': False, 'error': 'Names file is required for split by names'}, 400)
         
         # Create job with split configuration
-        from models.job import Job
         job = Job(
             data_path=str(input_file_path),
             job_type='split'
@@ -400,137 +908,106 @@ def create_split_job():
         manager.save_job_metadata(job)
         
         # Start processing in background
-        auto_process = request.form.get('auto_process', 'true').lower() == 'true'
+        auto_process = form.get('auto_process', 'true').lower() == 'true'
         if auto_process:
-            import threading
-            job._cancel_event = threading.Event()
-            thread = threading.Thread(target=manager.process_job, args=(job.id,))
-            thread.daemon = False
-            job._thread = thread
-            thread.start()
-        
-        return jsonify({
+            _start_job(manager, job)
+        
+        _invalidate_jobs_cache()
+        
+        return jresp({
             'success': True,
             'job': job.to_dict(),
             'message': 'Split job created successfully'
-        }), 201
+        }, 201)
     
+    except RequestEntityTooLarge:
+        raise  # Answered by the app's 413 handler
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/merge-jobs', methods=['POST'])
+@upload_limit('MAX_MERGE_CONTENT_LENGTH')
 def create_merge_job():
     """Create a new merge job."""
     try:
+        form = request.form
+        files = request.files
         manager = get_job_manager()
         
         # Get merge configuration
-        merge_mode = request.form.get('merge_mode', 'paired')
+        merge_mode = form.get('merge_mode', 'paired')
         
         if merge_mode not in ['paired', 'sequential']:
-            return jsonify({'success': False, 'error': 'Invalid merge_mode. Use "paired" or "sequential"'}), 400
+            return jresp({'success': False, 'error': 'Invalid merge_mode. Use "paired" or "sequential"'}, 400)
         
         file_paths = []
         directory_path = None
         
         if merge_mode == 'paired':
             # Paired mode: exactly 2 files required
-            file1_path = None
-            file2_path = None
+            file1_path, valid = _accept_upload(files, 'file1', SPLIT_MERGE_EXTENSIONS)
+            if not valid:
+                return jresp({'success': False, 'error': 'Invalid file1 format. Only PDF and Word files supported.'}, 400)
             
-            if 'file1' in request.files:
-                file1 = request.files['file1']
-                if file1 and file1.filename:
-                    ext = Path(file1.filename).suffix.lower()
-                    if ext not in ['.pdf', '.docx', '.doc']:
-                        return jsonify({'success': False, 'error': 'Invalid file1 format. Only PDF and Word files supported.'}), 400
-                    
-                    filename = secure_filename(file1.filename)
-                    upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                    upload_dir.mkdir(parents=True, exist_ok=True)
-                    file1_path = upload_dir / filename
-                    file1.save(str(file1_path))
-            
-            if 'file2' in request.files:
-                file2 = request.files['file2']
-                if file2 and file2.filename:
-                    ext = Path(file2.filename).suffix.lower()
-                    if ext not in ['.pdf', '.docx', '.doc']:
-                        return jsonify({'success': False, 'error': 'Invalid file2 format. Only PDF and Word files supported.'}), 400
-                    
-                    filename = secure_filename(file2.filename)
-                    upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                    file2_path = upload_dir / filename
-                    file2.save(str(file2_path))
+            file2_path, valid = _accept_upload(files, 'file2', SPLIT_MERGE_EXTENSIONS)
+            if not valid:
+                return jresp({'success': False, 'error': 'Invalid file2 format. Only PDF and Word files supported.'}, 400)
             
             # Handle paths (if files not uploaded)
-            if not file1_path and request.form.get('file1_path'):
-                file1_path = request.form.get('file1_path')
-                if not os.path.exists(file1_path):
-                    return jsonify({'success': False, 'error': 'File1 not found'}), 400
+            if not file1_path and form.get('file1_path'):
+                file1_path = form.get('file1_path')
+                if not _path_exists(file1_path):
+                    return jresp({'success': False, 'error': 'File1 not found'}, 400)
             
-            if not file2_path and request.form.get('file2_path'):
-                file2_path = request.form.get('file2_path')
-                if not os.path.exists(file2_path):
-                    return jsonify({'success': False, 'error': 'File2 not found'}), 400
+            if not file2_path and form.get('file2_path'):
+                file2_path = form.get('file2_path')
+                if not _path_exists(file2_path):
+                    return jresp({'success': False, 'error': 'File2 not found'}, 400)
             
             # Validate inputs
             if not file1_path or not file2_path:
-                return jsonify({'success': False, 'error': 'Two input files are required for paired merge'}), 400
+                return jresp({'success': False, 'error': 'Two input files are required for paired merge'}, 400)
             
             # Check file types match
-            ext1 = Path(file1_path).suffix.lower()
-            ext2 = Path(file2_path).suffix.lower()
-            if ext1 != ext2:
-                return jsonify({'success': False, 'error': 'Both files must be the same format'}), 400
+            if _suffix(str(file1_path)).lower() != _suffix(str(file2_path)).lower():
+                return jresp({'success': False, 'error': 'Both files must be the same format'}, 400)
             
             file_paths = [str(file1_path), str(file2_path)]
         
         else:  # sequential mode
             # Sequential mode: multiple files or directory path
-            sequential_source = request.form.get('sequential_source', 'files')
+            sequential_source = form.get('sequential_source', 'files')
             
             if sequential_source == 'path':
                 # Directory path
-                directory_path = request.form.get('directory_path', '').strip()
+                directory_path = form.get('directory_path', '').strip()
                 if not directory_path:
-                    return jsonify({'success': False, 'error': 'Directory path is required'}), 400
+                    return jresp({'success': False, 'error': 'Directory path is required'}, 400)
                 if not os.path.exists(directory_path):
-                    return jsonify({'success': False, 'error': 'Directory not found'}), 400
+                    return jresp({'success': False, 'error': 'Directory not found'}, 400)
                 if not os.path.isdir(directory_path):
-                    return jsonify({'success': False, 'error': 'Path is not a directory'}), 400
+                    return jresp({'success': False, 'error': 'Path is not a directory'}, 400)
             
             else:
                 # Multiple files
-                uploaded_files = request.files.getlist('files')
+                uploaded_files = files.getlist('files')
                 
                 if not uploaded_files or len(uploaded_files) == 0:
-                    return jsonify({'success': False, 'error': 'At least one file is required for sequential merge'}), 400
+                    return jresp({'success': False, 'error': 'At least one file is required for sequential merge'}, 400)
                 
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                upload_dir.mkdir(parents=True, exist_ok=True)
+                # Validate all files are the same format before saving any of them
+                uploaded_files = [file for file in uploaded_files if file and file.filename]
+                exts = [_suffix(file.filename).lower() for file in uploaded_files]
+                for file, ext in zip(uploaded_files, exts):
+                    if ext not in SPLIT_MERGE_EXTENSIONS:
+                        return jresp({'success': False, 'error': f'Invalid file format: {file.filename}. Only PDF and Word files supported.'}, 400)
+                if len(set(exts)) > 1:
+                    return jresp({'success': False, 'error': 'All files must be the same format'}, 400)
                 
-                # Validate all files are the same format
-                first_ext = None
-                for file in uploaded_files:
-                    if file and file.filename:
-                        ext = Path(file.filename).suffix.lower()
-                        if ext not in ['.pdf', '.docx', '.doc']:
-                            return jsonify({'success': False, 'error': f'Invalid file format: {file.filename}. Only PDF and Word files supported.'}), 400
-                        
-                        if first_ext is None:
-                            first_ext = ext
-                        elif ext != first_ext:
-                            return jsonify({'success': False, 'error': 'All files must be the same format'}), 400
-                        
-                        filename = secure_filename(file.filename)
-                        file_path = upload_dir / filename
-                        file.save(str(file_path))
-                        file_paths.append(str(file_path))
+                file_paths = [str(path) for path in _save_uploads(uploaded_files)]
         
         # Create job with merge configuration
-        from models.job import Job
         job = Job(
             job_type='merge'
         )
@@ -540,7 +1017,7 @@ def create_merge_job():
             'merge_mode': merge_mode,
             'file_paths': file_paths if file_paths else None,
             'directory_path': directory_path if directory_path else None,
-            'sequential_source': request.form.get('sequential_source') if merge_mode == 'sequential' else None
+            'sequential_source': form.get('sequential_source') if merge_mode == 'sequential' else None
         }
         
         # Save job
@@ -548,23 +1025,22 @@ def create_merge_job():
         manager.save_job_metadata(job)
         
         # Start processing in background
-        auto_process = request.form.get('auto_process', 'true').lower() == 'true'
+        auto_process = form.get('auto_process', 'true').lower() == 'true'
         if auto_process:
-            import threading
-            job._cancel_event = threading.Event()
-            thread = threading.Thread(target=manager.process_job, args=(job.id,))
-            thread.daemon = False
-            job._thread = thread
-            thread.start()
-        
-        return jsonify({
+            _start_job(manager, job)
+        
+        _invalidate_jobs_cache()
+        
+        return jresp({
             'success': True,
             'job': job.to_dict(),
             'message': 'Merge job created successfully'
-        }), 201
+        }, 201)
     
+    except RequestEntityTooLarge:
+        raise  # Answered by the app's 413 handler
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>/process', methods=['POST'])
@@ -575,94 +1051,81 @@ def process_job(job_id):
         job = manager.get_job(job_id)
         
         if not job:
-            return jsonify({'success': False, 'error': 'Job not found'}), 404
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
         if job.status != JobStatus.PENDING:
-            return jsonify({'success': False, 'error': f'Job cannot be processed (status: {job.status.value})'}), 400
+            return jresp({'success': False, 'error': f'Job cannot be processed (status: {job.status.value})'}, 400)
+        
+        # Process in background worker
+        _start_job(manager, job)
         
-        # Process in background thread
-        import threading
-        job._cancel_event = threading.Event()
-        thread = threading.Thread(target=manager.process_job, args=(job_id,))
-        thread.daemon = False
-        job._thread = thread
-        thread.start()
+        _invalidate_jobs_cache()
         
-        return jsonify({
+        return jresp({
             'success': True,
             'message': 'Job processing started',
             'job_id': job_id
         })
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>', methods=['PUT'])
 def update_job(job_id):
     """Update an existing job."""
     try:
+        form = request.form
+        files = request.files
+        cfg = current_app.config
         manager = get_job_manager()
         job = manager.get_job(job_id)
         
         if not job:
-            return jsonify({'success': False, 'error': 'Job not found'}), 404
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
         if job.status != JobStatus.PENDING:
-            return jsonify({'success': False, 'error': 'Can only edit pending jobs'}), 400
+            return jresp({'success': False, 'error': 'Can only edit pending jobs'}, 400)
         
         # Handle file updates (same logic as create)
         template_path = job.template_path
         data_path = job.data_path
         
-        if 'template_file' in request.files:
-            template_file = request.files['template_file']
-            if template_file and template_file.filename:
-                if not allowed_file(template_file.filename, current_app.config['ALLOWED_TEMPLATE_EXTENSIONS']):
-                    return jsonify({'success': False, 'error': 'Invalid template file format'}), 400
-                
-                filename = secure_filename(template_file.filename)
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                template_path = upload_dir / filename
-                template_file.save(str(template_path))
-        elif request.form.get('template_path'):
-            template_path = request.form.get('template_path')
-        
-        if 'data_file' in request.files:
-            data_file = request.files['data_file']
-            if data_file and data_file.filename:
-                if not allowed_file(data_file.filename, current_app.config['ALLOWED_DATA_EXTENSIONS']):
-                    return jsonify({'success': False, 'error': 'Invalid data file format'}), 400
-                
-                filename = secure_filename(data_file.filename)
-                upload_dir = Path(current_app.config['UPLOAD_DIR'])
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                data_path = upload_dir / filename
-                data_file.save(str(data_path))
-        elif request.form.get('data_path'):
-            data_path = request.form.get('data_path')
+        uploaded, valid = _accept_upload(files, 'template_file', cfg['ALLOWED_TEMPLATE_EXTENSIONS'])
+        if not valid:
+            return jresp({'success': False, 'error': 'Invalid template file format'}, 400)
+        if uploaded:
+            template_path = uploaded
+        elif 'template_file' not in files:
+            template_path = form.get('template_path') or template_path
+        
+        uploaded, valid = _accept_upload(files, 'data_file', cfg['ALLOWED_DATA_EXTENSIONS'])
+        if not valid:
+            return jresp({'success': False, 'error': 'Invalid data file format'}, 400)
+        if uploaded:
+            data_path = uploaded
+        elif 'data_file' not in files:
+            data_path = form.get('data_path') or data_path
         
         # Update job properties
         job.template_path = str(template_path)
         job.data_path = str(data_path)
         
         # Update output formats
-        if request.form.get('output_formats'):
-            output_formats = request.form.get('output_formats')
-            if isinstance(output_formats, str):
-                job.output_formats = [f.strip() for f in output_formats.split(',')]
+        output_formats = form.get('output_formats')
+        if output_formats:
+            job.output_formats = [f.strip() for f in output_formats.split(',')]
         
         # Update Excel print settings
-        if request.form.get('excel_print_settings'):
-            import json
+        raw = form.get('excel_print_settings')
+        if raw:
             try:
-                job.excel_print_settings = json.loads(request.form.get('excel_print_settings'))
+                job.excel_print_settings = load_json(raw)
             except:
                 pass
         
         # Update output directory
-        output_directory = request.form.get('output_directory', '').strip()
+        output_directory = form.get('output_directory', '').strip()
         if output_directory:
             job.output_directory = output_directory
         
@@ -677,11 +1140,13 @@ def update_job(job_id):
         job.local_data_path = data_info['local_path']
         
         # Copy files to job directory
-        job_template_path = job_dir / f"template{Path(job.template_path).suffix}"
-        job_data_path = job_dir / f"data{Path(job.data_path).suffix}"
+        job_template_path = job_dir / f"template{_suffix(job.template_path)}"
+        job_data_path = job_dir / f"data{_suffix(job.data_path)}"
         
-        shutil.copy2(job.local_template_path, job_template_path)
-        shutil.copy2(job.local_data_path, job_data_path)
+        copy_files(
+            (job.local_template_path, job_template_path),
+            (job.local_data_path, job_data_path)
+        )
         
         job.metadata['job_template_path'] = str(job_template_path)
         job.metadata['job_data_path'] = str(job_data_path)
@@ -689,14 +1154,19 @@ def update_job(job_id):
         # Save updated job
         manager.save_job_metadata(job)
         
-        return jsonify({
+        _invalidate_jobs_cache()
+        _caches().path_exists.clear()  # Inputs may have been replaced or moved
+        
+        return jresp({
             'success': True,
             'job': job.to_dict(),
             'message': 'Job updated successfully'
         })
         
+    except RequestEntityTooLarge:
+        raise  # Answered by the app's 413 handler
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>/rerun', methods=['POST'])
@@ -707,7 +1177,7 @@ def rerun_job(job_id):
         original_job = manager.get_job(job_id)
         
         if not original_job:
-            return jsonify({'success': False, 'error': 'Job not found'}), 404
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
         # Create new job with same settings
         filename_variable = original_job.metadata.get('filename_variable', '##filename##')
@@ -741,21 +1211,18 @@ def rerun_job(job_id):
         )
         
         # Start processing
-        import threading
-        new_job._cancel_event = threading.Event()
-        thread = threading.Thread(target=manager.process_job, args=(new_job.id,))
-        thread.daemon = False
-        new_job._thread = thread
-        thread.start()
-        
-        return jsonify({
+        _start_job(manager, new_job)
+        
+        _invalidate_jobs_cache()
+        
+        return jresp({
             'success': True,
             'job': new_job.to_dict(),
             'message': 'Job rerun started successfully'
         })
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
@@ -766,31 +1233,36 @@ def cancel_job(job_id):
         job = manager.get_job(job_id)
         
         if not job:
-            return jsonify({'success': False, 'error': 'Job not found'}), 404
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
         if job.status != JobStatus.PROCESSING:
-            return jsonify({'success': False, 'error': f'Job is not processing (status: {job.status.value})'}), 400
+            return jresp({'success': False, 'error': f'Job is not processing (status: {job.status.value})'}, 400)
         
         # Set cancellation flag
         if hasattr(job, '_cancel_event') and job._cancel_event:
             job._cancel_event.set()
             
+            # Stop an in-flight LibreOffice conversion instead of waiting for it
+            if getattr(job, '_soffice_pid', None):
+                terminate_process(job._soffice_pid)
+            
             # Wait up to 30 seconds for graceful shutdown
             if hasattr(job, '_thread') and job._thread:
-                job._thread.join(timeout=30.0)
+                futures_wait([job._thread], timeout=30.0)
+            _invalidate_jobs_cache()
             
-            return jsonify({
+            return jresp({
                 'success': True,
                 'message': 'Job cancelled successfully'
             })
         else:
-            return jsonify({
+            return jresp({
                 'success': False,
                 'error': 'Job does not support cancellation (older job format)'
-            }), 400
+            }, 400)
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>', methods=['DELETE'])
@@ -800,15 +1272,17 @@ def delete_job(job_id):
         manager = get_job_manager()
         force = request.args.get('force', 'false').lower() == 'true'
         result = manager.delete_job(job_id, force=force)
+        _invalidate_jobs_cache()
+        _caches().path_exists.clear()
         
         if not result['success']:
             status_code = 409 if 'processing' in result.get('error', '').lower() else 404
-            return jsonify(result), status_code
+            return jresp(result, status_code)
         
-        return jsonify(result)
+        return jresp(result)
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>/download', methods=['GET'])
@@ -819,82 +1293,83 @@ def download_job_output(job_id):
         job = manager.get_job(job_id)
         
         if not job:
-            return jsonify({'success': False, 'error': 'Job not found'}), 404
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
         if job.status != JobStatus.COMPLETED:
-            return jsonify({
+            return jresp({
                 'success': False, 
                 'error': f'Job is not completed yet (status: {job.status.value})'
-            }), 400
+            }, 400)
         
-        zip_path = manager.get_job_zip_file(job_id)
-        
-        print(f"Download request for job {job_id}")
-        print(f"ZIP path from metadata: {zip_path}")
-        print(f"Jobs directory: {manager.jobs_dir}")
+        # Stored absolute on the job, with the size and mtime recorded when the
+        # ZIP was written - revalidations are answered without touching disk
+        zip_path = job.zip_file_path
         
         if not zip_path:
-            return jsonify({
+            return jresp({
                 'success': False, 
                 'error': 'ZIP file path not set in job metadata'
-            }), 404
-        
-        # Convert relative path to absolute if needed
-        zip_path_obj = Path(zip_path)
-        if not zip_path_obj.is_absolute():
-            # Path is relative, make it absolute from BASE_DIR
-            from config.config import Config
-            zip_path = str(Config.BASE_DIR / zip_path)
-            print(f"Converted to absolute path: {zip_path}")
-        
-        if not os.path.exists(zip_path):
-            # Try to find the ZIP file in case path is wrong
-            job_dir = manager.get_job_dir(job_id)
-            expected_zip = job_dir / f"job_{job_id}_output.zip"
-            
-            print(f"ZIP not found at metadata path, checking: {expected_zip}")
-            print(f"Job directory exists: {job_dir.exists()}")
-            
-            if job_dir.exists():
-                print(f"Job directory contents: {list(job_dir.iterdir())}")
-            
-            if expected_zip.exists():
-                print(f"Found ZIP at expected location, updating metadata")
-                zip_path = str(expected_zip)
-                job.set_zip_file(zip_path)
-                manager.save_job_metadata(job)
-            else:
-                # List all files in job directory for debugging
-                files_in_dir = []
-                if job_dir.exists():
-                    for item in job_dir.rglob('*'):
-                        if item.is_file():
-                            files_in_dir.append(str(item.relative_to(job_dir)))
-                
-                return jsonify({
-                    'success': False, 
-                    'error': f'Output file not found. Expected at: {expected_zip}. Job directory: {job_dir}. Files found: {", ".join(files_in_dir) if files_in_dir else "none"}'
-                }), 404
+            }, 404)
+        
+        if job.zip_size is not None:
+            etag = f'{job.zip_mtime}-{job.zip_size}'
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+        
+        # Full downloads stat once: send_file opens the file anyway, and a
+        # missing ZIP is rebuilt from the outputs below
+        try:
+            zip_stat = os.stat(zip_path)
+        except FileNotFoundError:
+            # The archive was removed but the outputs are still there - build
+            # the ZIP while sending it rather than failing the download
+            archive_dir = manager.get_job_archive_dir(job)
+            if os.path.isdir(archive_dir):
+                return current_app.response_class(
+                    stream_zip_archive(archive_dir),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename=job_{job_id}_output.zip'}
+                )
+            return jresp({
+                'success': False, 
+                'error': f'Output file not found. Expected at: {zip_path}'
+            }, 404)
+        
+        zip_size, zip_mtime = zip_stat.st_size, zip_stat.st_mtime
+        if (zip_size, zip_mtime) != (job.zip_size, job.zip_mtime):
+            # The ZIP changed since it was recorded - keep the job and jobs.db in step
+            job.set_zip_file(zip_path)
+            manager.save_job_metadata(job)
         
         # Verify file size
-        file_size = os.path.getsize(zip_path)
-        if file_size == 0:
-            return jsonify({
+        if zip_size == 0:
+            return jresp({
                 'success': False, 
                 'error': 'Output file is empty. Job may have encountered errors.'
-            }), 500
+            }, 500)
         
+        offloaded = _accel_redirect(zip_path, 'application/zip', f'job_{job_id}_output.zip')
+        if offloaded is not None:
+            return offloaded
+        
+        # Conditional responses let clients revalidate and resume large
+        # downloads (Range); the file is handed to wsgi.file_wrapper as-is
         return send_file(
             zip_path,
             as_attachment=True,
             download_name=f'job_{job_id}_output.zip',
-            mimetype='application/zip'
+            mimetype='application/zip',
+            conditional=True,
+            etag=f'{zip_mtime}-{zip_size}',
+            last_modified=zip_mtime,
+            max_age=0
         )
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
+        current_app.logger.exception('download failed for job %s', job_id)
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>/files', methods=['GET'])
@@ -902,210 +1377,213 @@ def get_job_files(job_id):
     """Get list of output files for a job."""
     try:
         manager = get_job_manager()
+        job = manager.get_job(job_id)
+        
+        # A finished job's outputs don't change until it is rerun or edited,
+        # both of which move updated_at - serve the listing without re-scanning
+        cache_key = None
+        if job is not None and job.status in TERMINAL_STATUSES:
+            cache_key = (job.updated_at, _caches().jobs_version, len(job.output_files))
+            cached = job._files_cache
+            if cached is not None and cached[0] == cache_key:
+                return _json_body(cached[1])
+        
         files = manager.get_job_output_files(job_id)
         job_dir = manager.get_job_dir(job_id)
         
+        # Relative paths are sliced off this prefix instead of Path.relative_to
+        job_dir_str = str(job_dir) + os.sep
+        # One scandir per output directory supplies every file size in it
+        dir_sizes = {}
+        
         # Convert to relative paths and organize by format
         output_files = {}
         for file_path in files:
-            path = Path(file_path)
-            format_name = path.parent.name
-            if format_name not in output_files:
-                output_files[format_name] = []
+            file_path = str(file_path)
+            parent, name = os.path.split(file_path)
+            format_name = os.path.basename(parent)
+            
+            sizes = dir_sizes.get(parent)
+            if sizes is None:
+                sizes = dir_sizes[parent] = _scan_file_sizes(parent)
+            size = sizes.get(name)
+            if size is None:
+                size = _safe_size(file_path) or 0
             
             # Get relative path from job directory
-            try:
-                relative_path = path.relative_to(job_dir)
+            if file_path.startswith(job_dir_str):
                 # Convert to forward slashes for URL compatibility
-                relative_path_str = str(relative_path).replace('\\', '/')
-            except ValueError:
-                # If relative_to fails, try to extract from outputs onwards
-                relative_path_str = str(path).replace('\\', '/')
+                relative_path_str = file_path[len(job_dir_str):].replace('\\', '/')
+            else:
+                # Outside the job directory - try to extract from outputs onwards
+                relative_path_str = file_path.replace('\\', '/')
                 if '/outputs/' in relative_path_str:
                     relative_path_str = 'outputs/' + relative_path_str.split('/outputs/')[-1]
                 else:
-                    relative_path_str = path.name
+                    relative_path_str = name
             
-            output_files[format_name].append({
-                'name': path.name,
+            output_files.setdefault(format_name, []).append({
+                'name': name,
                 'path': relative_path_str,
-                'size': os.path.getsize(file_path) if os.path.exists(file_path) else 0
+                'size': size
             })
         
-        return jsonify({
+        body = dump_json({
             'success': True,
             'files': output_files
         })
+        if cache_key is not None:
+            job._files_cache = (cache_key, body)
+        return _json_body(body)
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/jobs/<job_id>/preview/<path:file_path>', methods=['GET'])
 def preview_file(job_id, file_path):
     """Preview a specific output file."""
     try:
-        print(f"[PREVIEW] job_id: {job_id}")
-        print(f"[PREVIEW] file_path received: {file_path}")
-        
         manager = get_job_manager()
         job = manager.get_job(job_id)
         
         if not job:
-            return jsonify({'success': False, 'error': 'Job not found'}), 404
-        
-        # Construct full path
-        job_dir = manager.get_job_dir(job_id)
-        full_path = job_dir / file_path
+            return jresp({'success': False, 'error': 'Job not found'}, 404)
         
-        print(f"[PREVIEW] job_dir: {job_dir}")
-        print(f"[PREVIEW] full_path: {full_path}")
-        print(f"[PREVIEW] file exists: {full_path.exists()}")
+        # Construct full path; safe_join refuses anything outside the job directory
+        full_path = safe_join(str(manager.get_job_dir(job_id)), file_path)
+        if full_path is None:
+            return jresp({'success': False, 'error': 'File not found'}, 404)
         
-        if not full_path.exists():
-            return jsonify({'success': False, 'error': f'File not found: {full_path}'}), 404
+        current_app.logger.debug("[PREVIEW] job=%s path=%s", job_id, full_path)
         
         # Determine mime type
-        ext = full_path.suffix.lower()
-        mime_types = {
-            '.pdf': 'application/pdf',
-            '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            '.msg': 'application/vnd.ms-outlook'
-        }
-        
-        return send_file(
-            str(full_path),
-            mimetype=mime_types.get(ext, 'application/octet-stream')
-        )
+        ext = _suffix(file_path).lower()
+        mimetype = _MIME_TYPES.get(ext, _DEFAULT_MIME_TYPE)
+        
+        offloaded = _accel_redirect(full_path, mimetype)
+        if offloaded is not None:
+            return offloaded
+        
+        # send_file stats the file itself - a missing file surfaces here
+        try:
+            return send_file(
+                full_path,
+                mimetype=mimetype,
+                conditional=True
+            )
+        except FileNotFoundError:
+            return jresp({'success': False, 'error': f'File not found: {full_path}'}, 404)
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
     """Get dashboard statistics."""
     try:
+        now = time.monotonic()
+        stats_cache = _caches().stats
+        if stats_cache['body'] is not None and now < stats_cache['expires']:
+            return _json_body(stats_cache['body'])
+        
         manager = get_job_manager()
         stats = manager.get_dashboard_stats()
+        stats['queued_jobs'] = _queued_job_count()
         
-        return jsonify({
+        body = dump_json({
             'success': True,
             'stats': stats
         })
+        stats_cache['body'], stats_cache['expires'] = body, now + STATS_CACHE_TTL
+        return _json_body(body)
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jresp({'success': False, 'error': str(e)}, 500)
 
 
 @api_bp.route('/formats', methods=['GET'])
 def get_available_formats():
     """Get available output formats."""
-    return jsonify({
+    return _json_body(current_app.extensions['formats_body'])
+
+
+@api_bp.record
+def _encode_formats_body(state):
+    """Serialize the /formats response when the blueprint is registered; the format list is fixed per app."""
+    state.app.extensions['formats_body'] = dump_json({
         'success': True,
-        'formats': current_app.config['AVAILABLE_OUTPUT_FORMATS']
+        'formats': list(state.app.config['AVAILABLE_OUTPUT_FORMATS'])
     })
 
 
+# Constant response - encoded once; each request only wraps the bytes
+_HEALTH_BODY = dump_json({
+    'success': True,
+    'status': 'healthy',
+    'service': 'Document Automation API'
+})
+
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        'success': True,
-        'status': 'healthy',
-        'service': 'Document Automation API'
-    })
+    return _json_body(_HEALTH_BODY)
 
 
 @api_bp.route('/browse-file', methods=['POST'])
 def browse_file():
     """Open native file dialog and return selected file path."""
     try:
-        import tkinter as tk
-        from tkinter import filedialog
+        if not _dialog_available():
+            return jresp({'success': False, 'error': 'No display available for file dialog'}, 503)
         
         # Get file type from request
         file_type = request.json.get('type', 'template')  # 'template' or 'data'
         
-        # Create root window (hidden)
-        root = tk.Tk()
-        root.withdraw()
-        root.attributes('-topmost', True)
-        
-        # Set file types based on request
-        if file_type == 'template':
-            filetypes = [
-                ('All Template Files', '*.docx *.xlsx *.msg'),
-                ('Word Documents', '*.docx'),
-                ('Excel Files', '*.xlsx'),
-                ('Outlook Messages', '*.msg'),
-                ('All Files', '*.*')
-            ]
-        else:  # data
-            filetypes = [
-                ('Excel Files', '*.xlsx *.xls'),
-                ('All Files', '*.*')
-            ]
-        
-        # Open file dialog
-        file_path = filedialog.askopenfilename(
-            title=f'Select {file_type} file',
-            filetypes=filetypes
-        )
-        
-        root.destroy()
+        file_path = _run_file_dialog('file', file_type)
         
         if file_path:
-            return jsonify({
+            return jresp({
                 'success': True,
                 'path': file_path
             })
         else:
-            return jsonify({
+            return jresp({
                 'success': False,
                 'error': 'No file selected'
             })
             
     except Exception as e:
-        return jsonify({
+        return jresp({
             'success': False,
             'error': f'Failed to open file dialog: {str(e)}'
-        }), 500
+        }, 500)
 
 
 @api_bp.route('/browse-directory', methods=['POST'])
 def browse_directory():
     """Open native directory dialog and return selected directory path."""
     try:
-        import tkinter as tk
-        from tkinter import filedialog
-        
-        # Create root window (hidden)
-        root = tk.Tk()
-        root.withdraw()
-        root.attributes('-topmost', True)
-        
-        # Open directory dialog
-        dir_path = filedialog.askdirectory(
-            title='Select output directory'
-        )
+        if not _dialog_available():
+            return jresp({'success': False, 'error': 'No display available for directory dialog'}, 503)
         
-        root.destroy()
+        dir_path = _run_file_dialog('directory')
         
         if dir_path:
-            return jsonify({
+            return jresp({
                 'success': True,
                 'path': dir_path
             })
         else:
-            return jsonify({
+            return jresp({
                 'success': False,
                 'error': 'No directory selected'
             })
             
     except Exception as e:
-        return jsonify({
+        return jresp({
             'success': False,
             'error': f'Failed to open directory dialog: {str(e)}'
-        }), 500
+        }, 500)
@@ -48,6 +48,7 @@ a = Analysis(
         'click',
         'itsdangerous',
         'markupsafe',
+        'waitress',
         
         # PyWebView
         'webview',
@@ -107,6 +108,8 @@ a = Analysis(
     excludes=[
         'matplotlib',
         'scipy',
+        # Browse dialogs come from the pywebview window in the desktop app
+        'tkinter',
     ],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
@@ -17,6 +17,8 @@ class Config:
     # Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
+    # Request-path diagnostics are logged at DEBUG and skipped entirely above it
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO').upper()
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', '5000'))
     
@@ -37,10 +39,6 @@ class Config:
         # Logs directory in project root for dev
         LOGS_DIR = BASE_DIR / 'logs'
         LOGS_DIR.mkdir(parents=True, exist_ok=True)
-    print(f"[CONFIG] __file__ = {__file__}")
-    print(f"[CONFIG] BASE_DIR = {BASE_DIR}")
-    print(f"[CONFIG] BASE_DIR (absolute) = {BASE_DIR.absolute()}")
-    print(f"[CONFIG] DATA_ROOT = {DATA_ROOT}")
     
     # Handle both absolute and relative paths from environment
     _jobs_dir = os.getenv('JOBS_DIR', 'jobs')
@@ -53,19 +51,34 @@ class Config:
     STORAGE_DIR = str(DATA_ROOT / _storage_dir) if not Path(_storage_dir).is_absolute() else _storage_dir
     UPLOAD_DIR = str(DATA_ROOT / _upload_dir) if not Path(_upload_dir).is_absolute() else _upload_dir
     
-    print(f"[CONFIG] JOBS_DIR = {JOBS_DIR}")
-    print(f"[CONFIG] STORAGE_DIR = {STORAGE_DIR}")
-    print(f"[CONFIG] UPLOAD_DIR = {UPLOAD_DIR}")
-    print(f"[CONFIG] LOGS_DIR = {LOGS_DIR}")
+    # Static files: let browsers cache assets; served through wsgi.file_wrapper under waitress
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.getenv('SEND_FILE_MAX_AGE_DEFAULT', '86400'))
+    
+    # Job downloads behind a front-end server: let it stream the file instead
+    # of a Python worker. USE_X_SENDFILE is Flask's Apache/lighttpd switch;
+    # X_ACCEL_JOBS_PREFIX is the nginx internal location aliased to JOBS_DIR
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'False').lower() == 'true'
+    X_ACCEL_JOBS_PREFIX = os.getenv('X_ACCEL_JOBS_PREFIX', '')
     
     # File upload settings
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 100 * 1024 * 1024))  # 100MB default
+    # Sequential merges upload many documents in one request
+    MAX_MERGE_CONTENT_LENGTH = int(os.getenv('MAX_MERGE_CONTENT_LENGTH', 500 * 1024 * 1024))  # 500MB default
+    # Largest body any endpoint accepts; waitress refuses bigger ones before buffering them
+    MAX_REQUEST_BODY_SIZE = max(MAX_CONTENT_LENGTH, MAX_MERGE_CONTENT_LENGTH)
     ALLOWED_TEMPLATE_EXTENSIONS = {'.docx', '.xlsx', '.msg'}
     ALLOWED_DATA_EXTENSIONS = {'.xlsx', '.xls'}
     
     # Output format settings
     AVAILABLE_OUTPUT_FORMATS = ['pdf', 'pdf_merged', 'word', 'excel', 'excel_workbook', 'msg']
     
+    # Waitress request threads; socket I/O is multiplexed on its own event
+    # loop, so slow uploads/downloads don't hold one of these
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '8'))
+    # Open sockets accepted at once, and seconds before an idle one is closed
+    SERVER_CONNECTION_LIMIT = int(os.getenv('SERVER_CONNECTION_LIMIT', '200'))
+    SERVER_CHANNEL_TIMEOUT = int(os.getenv('SERVER_CHANNEL_TIMEOUT', '120'))
+    
     # Processing settings
     MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', '5'))
     JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', '3600'))  # 1 hour default
@@ -75,10 +88,12 @@ class Config:
     
     @staticmethod
     def init_app(app):
-        """Initialize application with configuration."""
-        # Create directories if they don't exist
-        for directory in [Config.JOBS_DIR, Config.STORAGE_DIR, Config.UPLOAD_DIR]:
-            Path(directory).mkdir(parents=True, exist_ok=True)
+        """
+        Initialize application with configuration.
+        
+        The data directories are created by create_app from app.config, so
+        configs that override them don't also create the defaults.
+        """
 
 
 # Configuration dictionary
@@ -7,11 +7,17 @@ import os
 from pathlib import Path
 import threading
 import time
+import socket
+import multiprocessing
 import webview
 from app import create_app
 from services.license_validator import LicenseValidator
 import base64
 
+# Base64 characters decoded per write in Api.save_file (a multiple of 4, so
+# every slice decodes on its own)
+SAVE_CHUNK_SIZE = 1024 * 1024
+
 class Api:
     """API class for PyWebView JavaScript bridge."""
     
@@ -26,10 +32,7 @@ class Api:
             dict with success status and path
         """
         try:
-            # Decode base64 data
-            file_data = base64.b64decode(data_base64)
-            
-            # Show save dialog
+            # Show save dialog first - nothing is decoded if the user cancels
             result = webview.windows[0].create_file_dialog(
                 webview.SAVE_DIALOG,
                 save_filename=filename
@@ -39,9 +42,11 @@ class Api:
                 # User selected a location
                 save_path = result[0] if isinstance(result, tuple) else result
                 
-                # Write file
-                with open(save_path, 'wb') as f:
-                    f.write(file_data)
+                # Decode and write in SAVE_CHUNK_SIZE slices so only one decoded
+                # chunk is held next to the payload, not a full decoded copy
+                with open(save_path, 'wb', buffering=SAVE_CHUNK_SIZE) as f:
+                    for start in range(0, len(data_base64), SAVE_CHUNK_SIZE):
+                        f.write(base64.b64decode(data_base64[start:start + SAVE_CHUNK_SIZE]))
                 
                 return {'success': True, 'path': save_path}
             else:
@@ -70,10 +75,47 @@ else:
     # Running in normal Python environment
     BASE_DIR = Path(__file__).parent
 
+# Local address the embedded server listens on and the window loads
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 5000
+SERVER_START_TIMEOUT = 15  # seconds
+
 def start_flask():
     """Start Flask server in a separate thread."""
     app = create_app()
-    app.run(host='127.0.0.1', port=5000, debug=False, use_reloader=False, threaded=True)
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host=SERVER_HOST, port=SERVER_PORT, debug=False, use_reloader=False, threaded=True)
+        return
+    # Waitress buffers request/response bodies on its I/O loop and only hands
+    # complete requests to its worker threads
+    from config.config import Config
+    serve(app, host=SERVER_HOST, port=SERVER_PORT, threads=Config.SERVER_THREADS,
+          connection_limit=Config.SERVER_CONNECTION_LIMIT,
+          channel_timeout=Config.SERVER_CHANNEL_TIMEOUT,
+          max_request_body_size=Config.MAX_REQUEST_BODY_SIZE)
+
+def wait_for_server(host=SERVER_HOST, port=SERVER_PORT, timeout=SERVER_START_TIMEOUT):
+    """
+    Block until the server accepts TCP connections.
+    
+    Args:
+        host: Server host
+        port: Server port
+        timeout: Seconds to wait at most
+        
+    Returns:
+        True once the port is listening, False on timeout
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
 
 def main():
     """Initialize and start the desktop application."""
@@ -113,7 +155,7 @@ def main():
     print("Starting Document Automation System...")
     print(f"Application log: {log_path}")
     
-    # Validate license
+    # Validate license - a check from the last 24h is reused and re-checked in the background
     validator = LicenseValidator()
     is_valid, message = validator.validate()
     
@@ -219,8 +261,9 @@ def main():
         flask_thread = threading.Thread(target=start_flask, daemon=True)
         flask_thread.start()
         
-        # Wait for Flask to start
-        time.sleep(3)
+        # Open the window as soon as the server is listening
+        if not wait_for_server():
+            print(f"[Warning] Server not listening after {SERVER_START_TIMEOUT}s, opening window anyway")
         
         # Find icon file
         icon_path = BASE_DIR / 'static' / 'icon.png'
@@ -233,7 +276,7 @@ def main():
         # Create native desktop window
         webview.create_window(
             'DAS - Document Automation System',
-            'http://127.0.0.1:5000',
+            f'http://{SERVER_HOST}:{SERVER_PORT}',
             width=1400,
             height=900,
             resizable=True,
@@ -250,4 +293,6 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
+    # Required for the PDF conversion process pool in frozen builds
+    multiprocessing.freeze_support()
     main()
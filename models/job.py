@@ -2,11 +2,11 @@
 Job Model
 Represents a document generation job with all its metadata and state.
 """
-import json
-import uuid
+import os
 from datetime import datetime
 from typing import List, Dict, Optional
 from enum import Enum
+from utils.helpers import dump_json, load_json
 
 
 class JobStatus(Enum):
@@ -18,6 +18,10 @@ class JobStatus(Enum):
     CANCELLED = "cancelled"
 
 
+# Statuses a job does not leave until it is rerun (O(1) membership, no list per check)
+TERMINAL_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED})
+
+
 class JobType(Enum):
     """Job type enumeration."""
     TEMPLATE = "template"  # Traditional template variable substitution
@@ -25,8 +29,31 @@ class JobType(Enum):
     MERGE = "merge"        # Merge multiple PDFs/Words
 
 
+# Timestamps are stored with isoformat() and read back with its inverse;
+# other date formats are not accepted
+_parse_iso = datetime.fromisoformat
+_TIMESTAMP_FIELDS = ('created_at', 'updated_at', 'started_at', 'completed_at')
+
+
+def _new_job_id() -> str:
+    """128 random bits in the dashed 8-4-4-4-12 shape of existing job IDs (no uuid.UUID object)."""
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
 class Job:
-    """Represents a document generation job."""
+    """Represents a document generation job (timestamps serialize as ISO 8601)."""
+    
+    # Thousands of jobs stay loaded - no per-instance __dict__
+    __slots__ = (
+        'id', 'job_type', 'template_path', 'templates', 'data_path', 'output_formats',
+        'status', 'created_at', '_updated_at', '_updated_dirty', 'started_at', 'completed_at',
+        'template_file_id', 'data_file_id', 'local_template_path', 'local_data_path',
+        'total_records', 'processed_records', 'failed_records', 'error_message',
+        'output_files', 'zip_file_path', 'zip_size', 'zip_mtime', 'metadata',
+        '_thread', '_cancel_event', '_soffice_pid', '_json_cache', '_files_cache',
+        'excel_print_settings', 'excel_auto_adjust_options', 'output_directory'
+    )
     
     def __init__(
         self,
@@ -48,7 +75,7 @@ class Job:
             templates: List of template dictionaries with path, priority, sheet info
             job_type: Type of job - 'template', 'split', or 'merge'
         """
-        self.id = job_id or str(uuid.uuid4())
+        self.id = job_id or _new_job_id()
         self.job_type = JobType(job_type) if job_type else JobType.TEMPLATE
         self.template_path = template_path  # Keep for backward compatibility
         self.templates = templates or []  # New: list of template configs
@@ -73,13 +100,18 @@ class Job:
         self.error_message: Optional[str] = None
         self.output_files: List[str] = []
         self.zip_file_path: Optional[str] = None
+        self.zip_size: Optional[int] = None  # Recorded with zip_file_path so downloads need no stat
+        self.zip_mtime: Optional[float] = None
         
         # Metadata
         self.metadata: Dict = {}
         
         # Thread tracking and cancellation
-        self._thread: Optional[object] = None  # Thread object running this job
+        self._thread: Optional[object] = None  # Future of the worker running this job
         self._cancel_event: Optional[object] = None  # threading.Event for cancellation
+        self._soffice_pid: Optional[int] = None  # pid of the soffice child currently converting
+        self._json_cache: Optional[tuple] = None  # (cache key, serialized to_dict()) for job listings
+        self._files_cache: Optional[tuple] = None  # (cache key, serialized output file listing)
         
         # Excel printing settings
         self.excel_print_settings: Optional[Dict] = None
@@ -94,16 +126,24 @@ class Job:
         """
         Convert Job to dictionary.
         
+        Always builds a fresh dict: routes and the manager assign fields
+        directly and mutate metadata/output_files in place, so no mutator
+        hook could keep a memoized copy current. Repeated reads go through
+        the serialized cache in app.routes._job_json instead.
+        
         Returns:
             Dictionary representation of the job
         """
         # Get actual paths from metadata if available, otherwise use the original paths
-        actual_template_path = self.metadata.get('job_template_path', self.template_path)
-        actual_data_path = self.metadata.get('job_data_path', self.data_path)
+        metadata = self.metadata
+        actual_template_path = metadata.get('job_template_path', self.template_path)
+        actual_data_path = metadata.get('job_data_path', self.data_path)
         
         # Get templates from metadata if using multi-template mode
-        templates_list = self.metadata.get('templates', self.templates if self.templates else [])
+        templates_list = metadata.get('templates', self.templates)  # self.templates is always a list
         
+        # A dict display is the fastest way to build this (a getattr
+        # comprehension over field names measured ~2.5x slower)
         return {
             'id': self.id,
             'job_type': self.job_type.value,
@@ -126,7 +166,9 @@ class Job:
             'error_message': self.error_message,
             'output_files': self.output_files,
             'zip_file_path': self.zip_file_path,
-            'metadata': self.metadata,
+            'zip_size': self.zip_size,
+            'zip_mtime': self.zip_mtime,
+            'metadata': metadata,
             'excel_print_settings': self.excel_print_settings,
             'excel_auto_adjust_options': self.excel_auto_adjust_options,
             'output_directory': self.output_directory
@@ -143,56 +185,99 @@ class Job:
         Returns:
             Job instance
         """
-        job = cls(
-            template_path=data.get('template_path'),
-            data_path=data.get('data_path'),
-            output_formats=data.get('output_formats', []),
-            job_id=data.get('id'),
-            job_type=data.get('job_type', 'template')
-        )
-        
-        # Set status
-        status_value = data.get('status', 'pending')
-        job.status = JobStatus(status_value)
+        return cls.from_dicts((data,))[0]
+    
+    @classmethod
+    def from_dicts(cls, rows) -> List['Job']:
+        """
+        Create Jobs from an iterable of dictionaries (bulk restore at startup).
         
-        # Set timestamps
-        if data.get('created_at'):
-            job.created_at = datetime.fromisoformat(data['created_at'])
-        if data.get('updated_at'):
-            job.updated_at = datetime.fromisoformat(data['updated_at'])
-        if data.get('started_at'):
-            job.started_at = datetime.fromisoformat(data['started_at'])
-        if data.get('completed_at'):
-            job.completed_at = datetime.fromisoformat(data['completed_at'])
+        Skips __init__ and sets every slot once, with lookups hoisted out of
+        the loop; from_dict is the single-row case.
         
-        # Set file tracking
-        job.template_file_id = data.get('template_file_id')
-        job.data_file_id = data.get('data_file_id')
-        job.local_template_path = data.get('local_template_path')
-        job.local_data_path = data.get('local_data_path')
+        Args:
+            rows: Iterable of dictionaries containing job data
+            
+        Returns:
+            List of Job instances, in input order
+        """
+        parse_iso = _parse_iso
+        status_map = JobStatus._value2member_map_
+        type_map = JobType._value2member_map_
+        new = cls.__new__
+        now = None
+        jobs = []
+        append = jobs.append
         
-        # Set processing details
-        job.total_records = data.get('total_records', 0)
-        job.processed_records = data.get('processed_records', 0)
-        job.failed_records = data.get('failed_records', 0)
-        job.error_message = data.get('error_message')
-        job.output_files = data.get('output_files', [])
-        job.zip_file_path = data.get('zip_file_path')
-        job.metadata = data.get('metadata', {})
-        job.excel_print_settings = data.get('excel_print_settings')
-        job.excel_auto_adjust_options = data.get('excel_auto_adjust_options')
-        job.output_directory = data.get('output_directory')
+        for data in rows:
+            get = data.get
+            job = new(cls)
+            
+            job.id = get('id') or _new_job_id()
+            job_type = get('job_type') or 'template'
+            job.job_type = type_map.get(job_type) or JobType(job_type)
+            status = get('status', 'pending')
+            job.status = status_map.get(status) or JobStatus(status)
+            
+            # Source files
+            job.template_path = get('template_path')
+            job.templates = []
+            job.data_path = get('data_path')
+            job.output_formats = get('output_formats') or []
+            
+            # Timestamps (isoformat() strings written by to_dict)
+            created_at, updated_at = get('created_at'), get('updated_at')
+            if not (created_at and updated_at) and now is None:
+                now = datetime.now()
+            job.created_at = parse_iso(created_at) if created_at else now
+            job._updated_at = parse_iso(updated_at) if updated_at else now
+            job._updated_dirty = False
+            started_at, completed_at = get('started_at'), get('completed_at')
+            job.started_at = parse_iso(started_at) if started_at else None
+            job.completed_at = parse_iso(completed_at) if completed_at else None
+            
+            # File tracking
+            job.template_file_id = get('template_file_id')
+            job.data_file_id = get('data_file_id')
+            job.local_template_path = get('local_template_path')
+            job.local_data_path = get('local_data_path')
+            
+            # Processing details
+            job.total_records = get('total_records', 0)
+            job.processed_records = get('processed_records', 0)
+            job.failed_records = get('failed_records', 0)
+            job.error_message = get('error_message')
+            job.output_files = get('output_files', [])
+            job.zip_file_path = get('zip_file_path')
+            job.zip_size = get('zip_size')
+            job.zip_mtime = get('zip_mtime')
+            job.metadata = get('metadata', {})
+            job.excel_print_settings = get('excel_print_settings')
+            job.excel_auto_adjust_options = get('excel_auto_adjust_options')
+            job.output_directory = get('output_directory')
+            
+            # Runtime state, never persisted
+            job._thread = None
+            job._cancel_event = None
+            job._soffice_pid = None
+            job._json_cache = None
+            job._files_cache = None
+            
+            append(job)
         
-        return job
+        return jobs
     
-    def to_json(self) -> str:
+    def to_json(self, indent: bool = False) -> str:
         """
-        Convert Job to JSON string.
+        Convert Job to JSON string (serialized with orjson when installed).
         
+        Args:
+            indent: Pretty-print with 2-space indentation
+            
         Returns:
             JSON string representation
         """
-        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+        return dump_json(self.to_dict(), indent=indent).decode('utf-8')
     
     @classmethod
     def from_json(cls, json_str: str) -> 'Job':
@@ -200,14 +285,28 @@ class Job:
         Create Job from JSON string.
         
         Args:
-            json_str: JSON string containing job data
+            json_str: JSON string (or bytes) containing job data
             
         Returns:
             Job instance
         """
-        data = json.loads(json_str)
+        data = load_json(json_str)
         return cls.from_dict(data)
     
+    @property
+    def updated_at(self) -> datetime:
+        """Last modification time; counter updates only mark it stale and it is stamped when read."""
+        if self._updated_dirty:
+            # Clear before stamping so an update racing this read marks it stale again
+            self._updated_dirty = False
+            self._updated_at = datetime.now()
+        return self._updated_at
+    
+    @updated_at.setter
+    def updated_at(self, value: datetime):
+        self._updated_dirty = False
+        self._updated_at = value
+    
     def update_status(self, status: JobStatus, error_message: Optional[str] = None):
         """
         Update job status.
@@ -221,7 +320,7 @@ class Job:
         
         if status == JobStatus.PROCESSING and not self.started_at:
             self.started_at = datetime.now()
-        elif status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
+        elif status in TERMINAL_STATUSES:
             self.completed_at = datetime.now()
         
         if error_message:
@@ -255,22 +354,27 @@ class Job:
         """Add an output file to the job."""
         if file_path not in self.output_files:
             self.output_files.append(file_path)
-            self.updated_at = datetime.now()
+            self._updated_dirty = True
     
     def set_zip_file(self, zip_path: str):
-        """Set the ZIP file path for the job."""
-        self.zip_file_path = zip_path
+        """Set the ZIP file path for the job (stored absolute) and record its size and mtime."""
+        self.zip_file_path = os.path.abspath(zip_path)
+        try:
+            zip_stat = os.stat(self.zip_file_path)
+            self.zip_size, self.zip_mtime = zip_stat.st_size, zip_stat.st_mtime
+        except OSError:
+            self.zip_size = self.zip_mtime = None
         self.updated_at = datetime.now()
     
     def increment_processed(self):
         """Increment the processed records counter."""
         self.processed_records += 1
-        self.updated_at = datetime.now()
+        self._updated_dirty = True
     
     def increment_failed(self):
         """Increment the failed records counter."""
         self.failed_records += 1
-        self.updated_at = datetime.now()
+        self._updated_dirty = True
     
     def get_summary(self) -> Dict:
         """
@@ -279,12 +383,15 @@ class Job:
         Returns:
             Dictionary with job summary
         """
+        duration = self.get_duration()
+        processed, total = self.processed_records, self.total_records
+        progress = (processed / total) * 100 if total else 0.0
         return {
             'id': self.id,
             'status': self.status.value,
-            'progress': f"{self.get_progress_percentage():.1f}%",
-            'records': f"{self.processed_records}/{self.total_records}",
-            'duration': f"{self.get_duration():.1f}s" if self.get_duration() else "N/A",
+            'progress': f"{progress:.1f}%",
+            'records': f"{processed}/{total}",
+            'duration': f"{duration:.1f}s" if duration else "N/A",
             'output_formats': ', '.join(self.output_formats),
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.isoformat(' ', 'seconds')  # Same text as strftime('%Y-%m-%d %H:%M:%S')
         }
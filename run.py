@@ -4,6 +4,12 @@ Main Application Entry Point
 from app import create_app
 from config.config import Config
 
+try:
+    from waitress import serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
 # Create Flask application
 app = create_app(Config)
 
@@ -15,8 +21,15 @@ if __name__ == '__main__':
     print(f"Debug mode: {Config.DEBUG}")
     print("=" * 60)
     
-    app.run(
-        host=Config.HOST,
-        port=Config.PORT,
-        debug=Config.DEBUG
-    )
+    if WAITRESS_AVAILABLE and not Config.DEBUG:
+        # Waitress supports wsgi.file_wrapper, so send_file responses skip Python-level reads
+        serve(app, host=Config.HOST, port=Config.PORT, threads=Config.SERVER_THREADS,
+              connection_limit=Config.SERVER_CONNECTION_LIMIT,
+              channel_timeout=Config.SERVER_CHANNEL_TIMEOUT,
+              max_request_body_size=Config.MAX_REQUEST_BODY_SIZE)
+    else:
+        app.run(
+            host=Config.HOST,
+            port=Config.PORT,
+            debug=Config.DEBUG
+        )
@@ -4,10 +4,35 @@ Extracts variables and data from Excel files with ##variable## format.
 """
 import pandas as pd
 import re
+import zipfile
+import xml.etree.ElementTree as ET
 from typing import List, Dict, Tuple
 from pathlib import Path
 from utils.file_handlers import open_workbook_safe
 
+# Workbook formats whose sheet list can be read straight from xl/workbook.xml
+ZIP_WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def _xlsx_sheet_names(file_path: str) -> List[str]:
+    """
+    Read sheet names from an .xlsx without loading the workbook.
+    
+    Only xl/workbook.xml is inflated - styles, shared strings and sheet
+    data are never touched.
+    
+    Args:
+        file_path: Path to the workbook
+        
+    Returns:
+        Sheet names in workbook order
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        with zf.open('xl/workbook.xml') as f:
+            root = ET.parse(f).getroot()
+    # Match on the local name so Strict OOXML namespaces work too
+    return [el.get('name') for el in root.iter() if el.tag.rpartition('}')[2] == 'sheet']
+
 
 class DocumentParser:
     """Parses Excel files to extract variables and data."""
@@ -45,6 +70,12 @@ class DocumentParser:
         if not Path(file_path).exists():
             return []
         
+        if str(file_path).lower().endswith(ZIP_WORKBOOK_EXTENSIONS):
+            try:
+                return _xlsx_sheet_names(file_path)
+            except (zipfile.BadZipFile, KeyError, ET.ParseError):
+                pass  # Not a well-formed package - let openpyxl try
+        
         try:
             with open_workbook_safe(file_path, read_only=True, data_only=True) as wb:
                 sheets = wb.sheetnames
@@ -67,18 +98,7 @@ class DocumentParser:
         
         try:
             with open_workbook_safe(file_path, read_only=True, data_only=True) as wb:
-                # Check each sheet for ##variable## pattern in first row
-                for sheet_name in wb.sheetnames:
-                    ws = wb[sheet_name]
-                    first_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
-                    
-                    if first_row:
-                        # Check if any cell contains ##variable## pattern
-                        for cell_value in first_row:
-                            if cell_value and isinstance(cell_value, str) and '##' in cell_value:
-                                return sheet_name
-                
-                return None
+                return self._find_data_sheet(wb)
         except:
             return None
     
@@ -97,19 +117,61 @@ class DocumentParser:
         
         try:
             with open_workbook_safe(file_path, read_only=True, data_only=True) as wb:
-                # Check each sheet for ##variable## pattern anywhere
-                for sheet_name in wb.sheetnames:
-                    ws = wb[sheet_name]
-                    # Check all cells in the sheet (limit to first 100 rows for performance)
-                    for row in ws.iter_rows(max_row=100, values_only=True):
-                        for cell_value in row:
-                            if cell_value and isinstance(cell_value, str) and '##' in cell_value:
-                                return sheet_name
-                
-                return None
+                return self._find_template_sheet(wb)
         except:
             return None
     
+    def get_sheets_and_detect(self, file_path: str, is_template: bool = False) -> Tuple[List[str], str]:
+        """
+        List sheets and detect the data/template sheet from a single workbook open.
+        
+        Args:
+            file_path: Path to Excel file
+            is_template: Detect a template sheet (##placeholder## anywhere)
+                instead of a data sheet (##variable## headers)
+            
+        Returns:
+            Tuple of (sheet names, detected sheet name or None)
+        """
+        if not Path(file_path).exists():
+            return [], None
+        
+        try:
+            with open_workbook_safe(file_path, read_only=True, data_only=True) as wb:
+                finder = self._find_template_sheet if is_template else self._find_data_sheet
+                return wb.sheetnames, finder(wb)
+        except:
+            # openpyxl can't read it; the sheet list may still be recoverable
+            return self.get_excel_sheets(file_path), None
+    
+    def _find_data_sheet(self, wb) -> str:
+        """Return the first sheet whose first row contains ##variable##, or None."""
+        # Check each sheet for ##variable## pattern in first row
+        for sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+            first_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            
+            if first_row:
+                # Check if any cell contains ##variable## pattern
+                for cell_value in first_row:
+                    if cell_value and isinstance(cell_value, str) and '##' in cell_value:
+                        return sheet_name
+        
+        return None
+    
+    def _find_template_sheet(self, wb) -> str:
+        """Return the first sheet containing ##placeholder## in its first 100 rows, or None."""
+        # Check each sheet for ##variable## pattern anywhere
+        for sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+            # Check all cells in the sheet (limit to first 100 rows for performance)
+            for row in ws.iter_rows(max_row=100, values_only=True):
+                for cell_value in row:
+                    if cell_value and isinstance(cell_value, str) and '##' in cell_value:
+                        return sheet_name
+        
+        return None
+    
     def parse_excel_data(self, file_path: str, sheet_name: str = None) -> Dict:
         """
         Parse Excel file to extract variables and data.
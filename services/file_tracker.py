@@ -25,6 +25,10 @@ class FileTracker:
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_file = self.storage_dir / "file_metadata.json"
         self.metadata = self._load_metadata()
+        
+        # path -> (size, mtime_ns, sha256); an unchanged stat means the file
+        # need not be read again to hash it
+        self._hash_cache: Dict[str, tuple] = {}
     
     def _load_metadata(self) -> Dict:
         """Load metadata from JSON file."""
@@ -48,11 +52,49 @@ class FileTracker:
         Returns:
             SHA-256 hash as hexadecimal string
         """
+        cached = self.get_cached_hash(file_path)
+        if cached is not None:
+            return cached
+        
         sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
             for byte_block in iter(lambda: f.read(4096), b""):
                 sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        digest = sha256_hash.hexdigest()
+        self.record_hash(file_path, digest)
+        return digest
+    
+    def get_cached_hash(self, file_path: str) -> Optional[str]:
+        """
+        Get a previously computed SHA-256 if the file is unchanged since.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            SHA-256 hash, or None if unknown or the file's size/mtime moved
+        """
+        cached = self._hash_cache.get(str(file_path))
+        if cached is None:
+            return None
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if (st.st_size, st.st_mtime_ns) != cached[:2]:
+            return None
+        return cached[2]
+    
+    def record_hash(self, file_path: str, sha256: str):
+        """
+        Remember the SHA-256 of a file as it is now (e.g. hashed while uploading).
+        
+        Args:
+            file_path: Path to the file
+            sha256: Hash of the file's current content
+        """
+        st = os.stat(file_path)
+        self._hash_cache[str(file_path)] = (st.st_size, st.st_mtime_ns, sha256)
     
     def get_file_id(self, original_path: str) -> str:
         """
@@ -98,8 +140,15 @@ class FileTracker:
         )
         
         if needs_update:
-            # Copy file to storage
-            shutil.copy2(original_path, local_path)
+            # Copy to a temp file and swap it in, so any existing link to the
+            # old storage copy (e.g. a job input) keeps the old content
+            tmp_path = local_path.with_name(f"{local_filename}.tmp")
+            try:
+                shutil.copy2(original_path, tmp_path)
+                os.replace(tmp_path, local_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
             
             # Update metadata
             self.metadata[file_id] = {
@@ -4,21 +4,32 @@ Converts documents between different formats (PDF, Word, Excel, .msg).
 """
 import os
 import sys
+import queue
 import shutil
+import socket
 import subprocess
+import re
+import tempfile
+import threading
 import time
+import zipfile
 from pathlib import Path
+from collections import OrderedDict
 from typing import List, Dict, Optional
-from io import StringIO
-from utils.file_handlers import open_workbook_safe
+from io import StringIO, BytesIO
+from config.config import Config
+from utils.file_handlers import open_workbook_safe, list_files
 
 try:
     from docx import Document
+except ImportError:
+    Document = None
+
+try:
     from docx2pdf import convert as docx2pdf_convert
     DOCX2PDF_AVAILABLE = True
 except ImportError:
     DOCX2PDF_AVAILABLE = False
-    Document = None
 
 try:
     import openpyxl
@@ -30,7 +41,8 @@ except ImportError:
 try:
     from reportlab.lib.pagesizes import letter, A4
     from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
     from reportlab.lib import colors
     REPORTLAB_AVAILABLE = True
 except ImportError:
@@ -44,6 +56,18 @@ except ImportError:
     WIN32_AVAILABLE = False
     pythoncom = None
 
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.connection import NoConnectException
+    from com.sun.star.lang import DisposedException
+    UNO_AVAILABLE = True
+except ImportError:
+    UNO_AVAILABLE = False
+    uno = None
+    PropertyValue = None
+    NoConnectException = DisposedException = None
+
 # Check for LibreOffice installation (portable or system)
 def _check_libreoffice():
     """Check if LibreOffice is available (portable or system)."""
@@ -67,20 +91,614 @@ def _check_libreoffice():
 
 def _get_portable_soffice_path():
     """Get path to portable LibreOffice executable."""
-    # Get the base directory (handles both frozen and development)
-    if getattr(sys, 'frozen', False):
-        # Running in PyInstaller bundle
-        base_dir = sys._MEIPASS
-    else:
-        # Running in development
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    portable_path = os.path.join(base_dir, 'portable', 'libreoffice', 'program', 'soffice.exe')
-    return portable_path
+    return str(Config.BASE_DIR / 'portable' / 'libreoffice' / 'program' / 'soffice.exe')
+
+def _get_soffice_command():
+    """Get the soffice executable to run (portable if bundled, else system)."""
+    portable_path = _get_portable_soffice_path()
+    if portable_path and os.path.exists(portable_path):
+        return portable_path
+    return 'soffice'
 
 LIBREOFFICE_AVAILABLE = _check_libreoffice()
 
 
+
+class ConversionCancelled(RuntimeError):
+    """Raised when a conversion subprocess is stopped because its job was cancelled."""
+
+
+# How often a running soffice child is checked against its cancel event
+CANCEL_POLL_INTERVAL = 1.0
+# Grace period between terminate() and kill() for a cancelled soffice child
+CANCEL_KILL_GRACE = 2.0
+
+
+def _run_soffice(cmd: List[str], timeout: float, cancel_event=None, on_process=None,
+                 **popen_kwargs) -> subprocess.CompletedProcess:
+    """
+    Run a soffice command, stopping it promptly if the job is cancelled.
+    
+    Args:
+        cmd: Command line to run
+        timeout: Seconds to allow before raising subprocess.TimeoutExpired
+        cancel_event: Optional threading.Event polled every CANCEL_POLL_INTERVAL
+        on_process: Optional callable given the Popen once spawned and None once it exits
+        **popen_kwargs: Extra subprocess.Popen arguments (text, startupinfo, ...)
+        
+    Returns:
+        CompletedProcess with captured stdout/stderr
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+        **popen_kwargs
+    )
+    if on_process is not None:
+        on_process(process)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                # communicate() drains the pipes so a chatty child cannot block
+                stdout, stderr = process.communicate(
+                    timeout=max(0.0, min(CANCEL_POLL_INTERVAL, deadline - time.monotonic()))
+                )
+                return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+            except subprocess.TimeoutExpired:
+                if cancel_event is not None and cancel_event.is_set():
+                    _stop_process(process)
+                    raise ConversionCancelled("Conversion cancelled")
+                if time.monotonic() >= deadline:
+                    _stop_process(process)
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+    finally:
+        if on_process is not None:
+            on_process(None)
+
+
+def _stop_process(process: subprocess.Popen):
+    """Terminate a child process, killing it if it ignores the request."""
+    process.terminate()
+    try:
+        process.communicate(timeout=CANCEL_KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+
+
+def terminate_process(pid: int):
+    """
+    Ask a conversion child process to exit by pid.
+    
+    Used by the cancel endpoint; the converting thread still reaps the child.
+    
+    Args:
+        pid: Process id of the soffice child
+    """
+    import signal
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError as e:
+        print(f"[LibreOffice] Could not terminate process {pid}: {e}")
+
+# UNO filter names used by the persistent listener, keyed by input extension
+UNO_PDF_FILTERS = {
+    '.docx': 'writer_pdf_Export',
+    '.doc': 'writer_pdf_Export',
+}
+
+
+class ListenerUnavailable(RuntimeError):
+    """The LibreOffice listener could not be reached over its UNO socket."""
+
+
+def _free_port(host: str) -> int:
+    """Ask the OS for a TCP port that is currently free on host."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class LibreOfficeListener:
+    """
+    Long-lived soffice process accepting UNO connections on a local socket.
+    
+    Spawning soffice for every document costs 2-3s of startup each time;
+    keeping one headless instance alive and pushing documents to it
+    sequentially removes that cost. Conversions are serialized with a lock
+    since a single soffice instance is not safe for concurrent loads.
+    """
+    
+    def __init__(self, host: str = '127.0.0.1', port: Optional[int] = None):
+        """
+        Initialize LibreOfficeListener.
+        
+        Args:
+            host: Interface the listener binds to
+            port: TCP port for the UNO socket (a free one is picked on each start if None)
+        """
+        self.host = host
+        self._requested_port = port
+        self.port = port
+        self.process = None
+        self._desktop = None
+        self._lock = threading.Lock()
+        # Dedicated per-process profile: CLI fallbacks don't attach to this
+        # instance, and a second app process (e.g. the reloader) gets its own
+        self._profile_dir = Path(tempfile.gettempdir()) / f'das_soffice_listener_{os.getpid()}'
+        self._profile_url = self._profile_dir.as_uri()
+    
+    @property
+    def accept_string(self) -> str:
+        """UNO connection string shared by the listener and the resolver."""
+        return f"socket,host={self.host},port={self.port};urp;"
+    
+    def start(self):
+        """Launch the headless soffice listener process."""
+        if self._requested_port is None:
+            self.port = _free_port(self.host)
+        cmd = [
+            _get_soffice_command(),
+            '--headless',
+            '--invisible',
+            '--nologo',
+            '--nofirststartwizard',
+            '--nolockcheck',
+            '--norestore',
+            f'-env:UserInstallation={self._profile_url}',
+            f'--accept={self.accept_string}',
+        ]
+        self.process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        )
+        self._desktop = None
+        print(f"[LibreOffice] Listener started (pid {self.process.pid}) on {self.host}:{self.port}")
+    
+    def is_alive(self) -> bool:
+        """Check whether the listener process is still running."""
+        return self.process is not None and self.process.poll() is None
+    
+    def ensure_running(self):
+        """Health check: restart the listener if its process has exited."""
+        if not self.is_alive():
+            if self.process is not None:
+                print(f"[LibreOffice] Listener exited (code {self.process.returncode}), restarting")
+            self.stop()
+            self.start()
+    
+    def stop(self):
+        """Terminate the listener process."""
+        process, self.process = self.process, None
+        self._desktop = None
+        try:
+            if process is None or process.poll() is not None:
+                return
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        finally:
+            # A crashed listener still leaves its profile behind
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+    
+    def _connect(self, timeout: float = 20.0):
+        """Resolve the remote desktop, retrying while soffice is still booting."""
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        deadline = time.time() + timeout
+        while True:
+            try:
+                ctx = resolver.resolve(f"uno:{self.accept_string}StarOffice.ComponentContext")
+                break
+            except Exception:
+                if time.time() >= deadline or not self.is_alive():
+                    raise ListenerUnavailable("Could not connect to LibreOffice listener")
+                time.sleep(0.25)
+        return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+    
+    def _convert(self, input_path: str, output_path: str, filter_name: str):
+        """Load, export and close one document through the bridge."""
+        if self._desktop is None:
+            self._desktop = self._connect()
+        
+        hidden = PropertyValue()
+        hidden.Name = 'Hidden'
+        hidden.Value = True
+        export_filter = PropertyValue()
+        export_filter.Name = 'FilterName'
+        export_filter.Value = filter_name
+        
+        document = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(input_path), "_blank", 0, (hidden,)
+        )
+        if document is None:
+            raise RuntimeError(f"LibreOffice could not load: {input_path}")
+        try:
+            document.storeToURL(uno.systemPathToFileUrl(output_path), (export_filter,))
+        finally:
+            document.close(True)
+    
+    def connect(self):
+        """Start soffice if needed and open the UNO bridge ahead of the first conversion."""
+        with self._lock:
+            self.ensure_running()
+            if self._desktop is None:
+                self._desktop = self._connect()
+    
+    def convert_to_pdf(self, input_path: str, output_path: str, filter_name: str = 'writer_pdf_Export'):
+        """
+        Convert a document to PDF through the running listener.
+        
+        Args:
+            input_path: Absolute path to the source document
+            output_path: Absolute path for the PDF
+            filter_name: LibreOffice export filter
+        """
+        with self._lock:
+            self.ensure_running()
+            try:
+                self._convert(input_path, output_path, filter_name)
+            except Exception as e:
+                if not self._is_bridge_error(e):
+                    raise  # The document itself failed to load or export
+                # Bridge is dead or soffice crashed mid-document - restart once and retry
+                self.stop()
+                self.start()
+                self._convert(input_path, output_path, filter_name)
+    
+    def _is_bridge_error(self, error: Exception) -> bool:
+        """True if error means the soffice process or UNO bridge is gone, not that the document is bad."""
+        if isinstance(error, ListenerUnavailable) or not self.is_alive():
+            return True
+        return UNO_AVAILABLE and isinstance(error, (DisposedException, NoConnectException))
+
+
+# Input types LibreOffice may convert to PDF in one batched invocation.
+# Excel is deliberately absent - Excel PDFs must go through MS Excel COM.
+BATCHABLE_PDF_INPUTS = ('.docx', '.doc')
+
+
+# Documents handed to each process-pool worker per soffice invocation
+POOL_BATCH_SIZE = 5
+
+
+def soffice_batch_to_pdf(paths: List[str], outdir: str, timeout: int = 300,
+                         isolated_profile: bool = False, cancel_event=None,
+                         on_process=None) -> List[str]:
+    """
+    Convert several documents to PDF with a single soffice invocation.
+    
+    Module-level so it can run in a process pool worker.
+    
+    Args:
+        paths: Absolute paths of documents to convert
+        outdir: Directory where soffice writes <stem>.pdf for each input
+        timeout: Seconds to allow for the whole batch
+        isolated_profile: Use a per-process LibreOffice profile so concurrent
+            soffice instances don't hand their work to each other
+        cancel_event: Optional threading.Event; stops soffice when set
+        on_process: Optional callable given the soffice Popen (see _run_soffice)
+        
+    Returns:
+        Input paths whose PDF was not produced
+    """
+    cmd = [
+        _get_soffice_command(),
+        '--headless',
+        '--invisible',
+        '--nologo',
+        '--nofirststartwizard',
+        '--nolockcheck',
+        '--norestore',
+    ]
+    if isolated_profile:
+        profile = Path(tempfile.gettempdir()) / f'das_soffice_{os.getpid()}'
+        cmd.append(f'-env:UserInstallation={profile.as_uri()}')
+    cmd.extend(['--convert-to', 'pdf', '--outdir', outdir, *paths])
+    try:
+        _run_soffice(cmd, timeout, cancel_event, on_process)
+    except (subprocess.TimeoutExpired, FileNotFoundError, ConversionCancelled) as e:
+        print(f"[LibreOffice] Batch conversion failed: {e}")
+        return list(paths)
+    
+    return [
+        path for path in paths
+        if not os.path.exists(os.path.join(outdir, f"{Path(path).stem}.pdf"))
+    ]
+
+
+# Reusable in-memory outputs for reportlab_word_to_pdf (the fast Word path)
+_PDF_BUFFER_POOL = queue.LifoQueue(maxsize=8)
+PDF_BUFFER_CAP = 128 * 1024
+
+
+def _acquire_pdf_buffer() -> BytesIO:
+    """Take an empty buffer from the pool, or allocate one if the pool is empty."""
+    try:
+        buf = _PDF_BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        return BytesIO()
+    buf.seek(0)
+    buf.truncate()
+    return buf
+
+
+def _release_pdf_buffer(buf: BytesIO):
+    """Return a buffer to the pool; oversized ones are dropped to cap memory."""
+    if buf.seek(0, os.SEEK_END) > PDF_BUFFER_CAP:
+        return
+    try:
+        _PDF_BUFFER_POOL.put_nowait(buf)
+    except queue.Full:
+        pass
+
+
+# Opt in to rendering simple Word documents with ReportLab instead of
+# LibreOffice/Word (base-14 fonts, no colours or tab stops)
+FAST_WORD_PDF = os.getenv('DAS_FAST_WORD_PDF', '0') == '1'
+
+
+class WordTemplateClassifier:
+    """
+    Decides whether a Word document is simple enough for the ReportLab renderer.
+    
+    Documents produced from templates only differ from their template by
+    substituted text, so their layout features match the template's.
+    Results are kept in a small LRU keyed on path and stat. Anything beyond styled paragraphs (tables, images, embedded
+    objects, explicit page or section breaks, headers/footers, fields, lists,
+    text boxes, footnotes, equations, hyperlinks, tabs, indents, spacing,
+    colours, text outside Latin-1) goes to LibreOffice/Word instead.
+    """
+    
+    COMPLEX_MARKERS = (
+        b'<w:tbl>', b'<w:tbl ', b'<w:drawing', b'<w:pict', b'<w:object',
+        b'w:type="page"', b'<w:pageBreakBefore', b'<w:txbxContent',
+        b'<w:headerReference', b'<w:footerReference', b'<w:fldSimple',
+        b'<w:fldChar', b'<w:numPr', b'<w:footnoteReference',
+        b'<w:endnoteReference', b'<m:oMath', b'<w:sdt>', b'<w:sdt ',
+        b'<w:hyperlink', b'<w:tab', b'<w:ind ', b'<w:spacing ', b'<w:color ',
+    )
+    
+    CACHE_SIZE = 256
+    
+    def __init__(self):
+        """Initialize WordTemplateClassifier."""
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def classify_xml(cls, document_xml: bytes) -> bool:
+        """
+        Classify a document.xml body.
+        
+        Returns:
+            True if the document only contains simple styled paragraphs
+        """
+        if document_xml.count(b'<w:sectPr') > 1:
+            return False
+        if any(marker in document_xml for marker in cls.COMPLEX_MARKERS):
+            return False
+        # Base-14 fonts only cover Latin-1
+        try:
+            document_xml.decode('utf-8').encode('latin-1')
+        except UnicodeError:
+            return False
+        return True
+    
+    def is_simple(self, docx_path: str) -> bool:
+        """
+        Classify a .docx file, caching the result per path, size and modification time.
+        
+        Args:
+            docx_path: Path to Word document
+            
+        Returns:
+            True if the document can be rendered with reportlab_word_to_pdf
+        """
+        try:
+            stat = os.stat(docx_path)
+        except OSError:
+            return False
+        key = (docx_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        try:
+            with zipfile.ZipFile(docx_path) as zf:
+                simple = self.classify_xml(zf.read('word/document.xml'))
+        except (zipfile.BadZipFile, KeyError):
+            simple = False
+        with self._lock:
+            self._cache[key] = simple
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return simple
+
+
+_SERIF_FONTS = ('times', 'cambria', 'georgia', 'garamond', 'book', 'palatino', 'serif')
+_MONO_FONTS = ('courier', 'consolas', 'mono')
+_BASE_FONTS = {
+    'Helvetica': ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Helvetica-BoldOblique'),
+    'Times': ('Times-Roman', 'Times-Bold', 'Times-Italic', 'Times-BoldItalic'),
+    'Courier': ('Courier', 'Courier-Bold', 'Courier-Oblique', 'Courier-BoldOblique'),
+}
+
+
+def _base_font_family(font_name: Optional[str]) -> str:
+    """Map a Word font name onto one of the standard PDF font families."""
+    name = (font_name or '').lower()
+    if any(key in name for key in _MONO_FONTS):
+        return 'Courier'
+    if any(key in name for key in _SERIF_FONTS):
+        return 'Times'
+    return 'Helvetica'
+
+
+def _xml_text(text: str) -> str:
+    """Escape text for ReportLab paragraph markup."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def reportlab_word_to_pdf(docx_bytes: bytes) -> bytes:
+    """
+    Render a simple Word document to PDF with ReportLab.
+    
+    Walks the paragraph list, taking fonts and sizes from the run formatting
+    or the styles in styles.xml, and lays the text out on the document's page
+    size and margins. Only meant for documents WordTemplateClassifier accepts.
+    
+    Args:
+        docx_bytes: Contents of the .docx file
+        
+    Returns:
+        PDF file contents
+    """
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("reportlab is required for Word to PDF rendering")
+    if Document is None:
+        raise ImportError("python-docx is required for Word to PDF rendering")
+    
+    doc = Document(BytesIO(docx_bytes))
+    section = doc.sections[0]
+    alignments = {1: TA_CENTER, 2: TA_RIGHT, 3: TA_JUSTIFY}
+    
+    elements = []
+    for index, para in enumerate(doc.paragraphs):
+        style = para.style
+        style_font = style.font if style is not None else None
+        style_size = style_font.size.pt if style_font is not None and style_font.size else 11
+        family = _base_font_family(style_font.name if style_font is not None else None)
+        
+        markup = []
+        for run in para.runs:
+            if not run.text:
+                continue
+            run_family = _base_font_family(run.font.name) if run.font.name else family
+            bold = run.bold if run.bold is not None else bool(style_font and style_font.bold)
+            italic = run.italic if run.italic is not None else bool(style_font and style_font.italic)
+            face = _BASE_FONTS[run_family][int(bool(bold)) + 2 * int(bool(italic))]
+            size = run.font.size.pt if run.font.size else style_size
+            text = _xml_text(run.text).replace('\n', '<br/>').replace('\t', '&nbsp;' * 4)
+            if run.underline:
+                text = f"<u>{text}</u>"
+            markup.append(f'<font name="{face}" size="{size:g}">{text}</font>')
+        
+        para_style = ParagraphStyle(
+            f"p{index}",
+            fontName=_BASE_FONTS[family][0],
+            fontSize=style_size,
+            leading=style_size * 1.2,
+            alignment=alignments.get(int(para.alignment) if para.alignment is not None else 0, TA_LEFT),
+            spaceAfter=style_size * 0.6,
+        )
+        # Empty paragraphs still take up a line in Word
+        elements.append(Paragraph(''.join(markup) or '&nbsp;', para_style))
+    
+    buf = _acquire_pdf_buffer()
+    try:
+        pdf = SimpleDocTemplate(
+            buf,
+            pagesize=(section.page_width.pt, section.page_height.pt),
+            leftMargin=section.left_margin.pt,
+            rightMargin=section.right_margin.pt,
+            topMargin=section.top_margin.pt,
+            bottomMargin=section.bottom_margin.pt,
+        )
+        pdf.build(elements)
+        return buf.getvalue()
+    finally:
+        _release_pdf_buffer(buf)
+
+
+_listener: Optional[LibreOfficeListener] = None
+
+
+def start_libreoffice_listener() -> Optional[LibreOfficeListener]:
+    """
+    Start the shared LibreOffice listener if LibreOffice and the UNO bridge are available.
+    
+    Returns:
+        The running listener, or None when conversions must spawn soffice per file
+    """
+    global _listener
+    if not (LIBREOFFICE_AVAILABLE and UNO_AVAILABLE):
+        return None
+    if _listener is None:
+        listener = LibreOfficeListener()
+        try:
+            listener.start()
+        except OSError as e:
+            print(f"[LibreOffice] Could not start listener: {e}")
+            return None
+        _listener = listener
+    return _listener
+
+
+def get_libreoffice_listener() -> Optional[LibreOfficeListener]:
+    """Get the shared LibreOffice listener, if one was started."""
+    return _listener
+
+
+# Set once warm_up() has imported the lazy conversion dependencies and
+# connected the listener; conversions briefly wait on it after start_warmup()
+warmup_done = threading.Event()
+WARMUP_WAIT = 5.0
+_warmup_started = False
+
+
+def warm_up():
+    """Import lazily-loaded conversion modules and connect the LibreOffice listener."""
+    start = time.time()
+    try:
+        import reportlab.pdfgen.canvas  # noqa: F401
+        import PyPDF2  # noqa: F401
+        import services.pdf_operations  # noqa: F401
+        import services.word_operations  # noqa: F401
+    except ImportError as e:
+        print(f"[Warmup] Optional import failed: {e}")
+    
+    listener = get_libreoffice_listener()
+    if listener is not None:
+        try:
+            listener.connect()
+        except Exception as e:
+            print(f"[Warmup] LibreOffice listener not ready: {e}")
+    
+    warmup_done.set()
+    print(f"[Warmup] Conversion engine ready in {time.time() - start:.2f}s")
+
+
+def start_warmup() -> threading.Thread:
+    """
+    Run warm_up() in a background daemon thread.
+    
+    Returns:
+        The started thread
+    """
+    global _warmup_started
+    _warmup_started = True
+    thread = threading.Thread(target=warm_up, name='conversion-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for_warmup(timeout: float = WARMUP_WAIT):
+    """Block until warm-up finished (at most timeout seconds); no-op if it never started."""
+    if _warmup_started and not warmup_done.is_set():
+        warmup_done.wait(timeout)
+
+
 class FormatConverter:
     """Converts documents between various formats."""
     
@@ -98,8 +716,13 @@ class FormatConverter:
         if LIBREOFFICE_AVAILABLE:
             methods.append("LibreOffice (optional)")
         print(f"[FormatConverter] Available methods: {', '.join(methods) if methods else 'None'}")
+        
+        self.word_classifier = WordTemplateClassifier()
+        # Per-thread cancel event / process hook for the conversion in flight
+        self._context = threading.local()
     
-    def convert(self, input_path: str, output_format: str, output_dir: str, print_settings: Optional[Dict] = None) -> str:
+    def convert(self, input_path: str, output_format: str, output_dir: str, print_settings: Optional[Dict] = None,
+                cancel_event=None, on_process=None) -> str:
         """
         Convert a document to specified format.
         
@@ -107,6 +730,8 @@ class FormatConverter:
             input_path: Path to input file
             output_format: Target format ('pdf', 'word', 'excel', 'excel_workbook', 'msg')
             output_dir: Directory for output file
+            cancel_event: Optional threading.Event; a running soffice child is stopped when set
+            on_process: Optional callable given each soffice Popen (and None when it exits)
             
         Returns:
             Path to converted file
@@ -116,19 +741,28 @@ class FormatConverter:
         
         os.makedirs(output_dir, exist_ok=True)
         
-        # Route to appropriate conversion method
-        if output_format == 'pdf':
-            return self._convert_to_pdf(input_path, output_dir, print_settings)
-        elif output_format == 'word':
-            return self._convert_to_word(input_path, output_dir)
-        elif output_format == 'excel':
-            return self._convert_to_excel_single(input_path, output_dir)
-        elif output_format == 'excel_workbook':
-            return self._convert_to_excel_workbook(input_path, output_dir)
-        elif output_format == 'msg':
-            return self._convert_to_msg(input_path, output_dir)
-        else:
-            raise ValueError(f"Unsupported output format: {output_format}")
+        # Don't race the background warm-up for the listener on a cold start
+        wait_for_warmup()
+        
+        self._context.cancel_event = cancel_event
+        self._context.on_process = on_process
+        try:
+            # Route to appropriate conversion method
+            if output_format == 'pdf':
+                return self._convert_to_pdf(input_path, output_dir, print_settings)
+            elif output_format == 'word':
+                return self._convert_to_word(input_path, output_dir)
+            elif output_format == 'excel':
+                return self._convert_to_excel_single(input_path, output_dir)
+            elif output_format == 'excel_workbook':
+                return self._convert_to_excel_workbook(input_path, output_dir)
+            elif output_format == 'msg':
+                return self._convert_to_msg(input_path, output_dir)
+            else:
+                raise ValueError(f"Unsupported output format: {output_format}")
+        finally:
+            self._context.cancel_event = None
+            self._context.on_process = None
     
     def _convert_to_pdf(self, input_path: str, output_dir: str, print_settings: Optional[Dict] = None) -> str:
         """Convert document to PDF."""
@@ -153,13 +787,20 @@ class FormatConverter:
         os.makedirs(output_dir, exist_ok=True)
         
         try:
-            if input_ext == '.docx':
+            if input_ext == '.docx' and self._can_render_word_with_reportlab(input_path):
+                # Simple text-only document: ReportLab (~100ms) instead of LibreOffice/Word
+                print(f"[FormatConverter] Using ReportLab for simple Word→PDF")
+                self._docx_to_pdf_reportlab(input_path, output_path)
+            
+            elif input_ext == '.docx':
                 # Convert Word to PDF - Try LibreOffice first (faster), fall back to COM
                 if LIBREOFFICE_AVAILABLE:
                     try:
                         # LibreOffice: Fast (1-2s), portable, good quality
                         print(f"[FormatConverter] Using LibreOffice for Word→PDF")
                         self._libreoffice_to_pdf(input_path, output_path)
+                    except ConversionCancelled:
+                        raise
                     except Exception as e:
                         print(f"[FormatConverter] LibreOffice failed: {e}")
                         if WIN32_AVAILABLE:
@@ -211,9 +852,7 @@ class FormatConverter:
             
             if not os.path.exists(output_path):
                 # Try to list what files ARE in the output directory
-                if os.path.exists(output_dir):
-                    files_in_dir = list(Path(output_dir).iterdir())
-                    print(f"[FormatConverter] Files in output dir: {files_in_dir}")
+                print(f"[FormatConverter] Files in output dir: {list_files(output_dir)}")
                 raise RuntimeError(f"PDF file was not created: {output_path}")
             
             file_size = os.path.getsize(output_path)
@@ -224,6 +863,18 @@ class FormatConverter:
             print(f"Error converting to PDF: {str(e)}")
             raise
     
+    def _can_render_word_with_reportlab(self, input_path: str) -> bool:
+        """Check whether a Word document should take the ReportLab fast path."""
+        return FAST_WORD_PDF and REPORTLAB_AVAILABLE and Document is not None \
+            and self.word_classifier.is_simple(input_path)
+    
+    def _docx_to_pdf_reportlab(self, input_path: str, output_path: str):
+        """Render a simple Word document to PDF with ReportLab."""
+        with open(input_path, 'rb') as f:
+            pdf_bytes = reportlab_word_to_pdf(f.read())
+        with open(output_path, 'wb') as f:
+            f.write(pdf_bytes)
+    
     def _has_complex_print_settings(self, print_settings: Dict) -> bool:
         """Check if print settings are complex enough to require COM."""
         if not print_settings:
@@ -254,13 +905,23 @@ class FormatConverter:
         print(f"[LibreOffice] Output: {abs_output}")
         print(f"[LibreOffice] Output dir: {output_dir}")
         
+        # Prefer the persistent listener - avoids soffice startup per document
+        listener = get_libreoffice_listener()
+        filter_name = UNO_PDF_FILTERS.get(Path(abs_input).suffix.lower())
+        if listener is not None and filter_name:
+            try:
+                listener.convert_to_pdf(abs_input, abs_output, filter_name)
+                if os.path.exists(abs_output):
+                    print(f"[LibreOffice] Converted via listener - {abs_output}")
+                    return
+            except Exception as e:
+                print(f"[LibreOffice] Listener conversion failed, spawning soffice: {e}")
+        
         # Get LibreOffice executable (portable or system)
-        portable_path = _get_portable_soffice_path()
-        if portable_path and os.path.exists(portable_path):
-            soffice_cmd = portable_path
+        soffice_cmd = _get_soffice_command()
+        if soffice_cmd != 'soffice':
             print(f"[LibreOffice] Using portable version: {soffice_cmd}")
         else:
-            soffice_cmd = 'soffice'
             print(f"[LibreOffice] Using system installation")
         
         try:
@@ -316,13 +977,13 @@ class FormatConverter:
                 startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
                 startupinfo.wShowWindow = subprocess.SW_HIDE
             
-            result = subprocess.run(
+            result = _run_soffice(
                 cmd,
-                capture_output=True,
-                timeout=60,  # Increased timeout for first run
+                60,  # Increased timeout for first run
+                getattr(self._context, 'cancel_event', None),
+                getattr(self._context, 'on_process', None),
                 text=True,
-                startupinfo=startupinfo,
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+                startupinfo=startupinfo
             )
             
             if result.returncode != 0:
@@ -341,9 +1002,7 @@ class FormatConverter:
             print(f"[LibreOffice] Expected file exists: {os.path.exists(expected_file)}")
             
             # List all files in output directory for debugging
-            if os.path.exists(output_dir):
-                files_in_dir = list(Path(output_dir).iterdir())
-                print(f"[LibreOffice] Files in output dir: {[f.name for f in files_in_dir]}")
+            print(f"[LibreOffice] Files in output dir: {list_files(output_dir)}")
             
             # Rename if needed
             if expected_file != abs_output and os.path.exists(expected_file):
@@ -1219,6 +1878,99 @@ DEBUG LOG (SUMMARY):
         
         return output_path
     
+    def can_batch_to_pdf(self, input_path: str) -> bool:
+        """Check whether a document can go through convert_batch_to_pdf."""
+        return LIBREOFFICE_AVAILABLE and Path(input_path).suffix.lower() in BATCHABLE_PDF_INPUTS \
+            and not self._can_render_word_with_reportlab(input_path)
+    
+    def convert_batch_to_pdf(self, input_paths: List[str], output_dir: str,
+                             pool=None, cancel_event=None, on_process=None) -> tuple:
+        """
+        Convert several Word documents to PDF, amortizing soffice startup.
+        
+        Files the batch fails on are re-run individually through the normal
+        PDF path (including the COM fallback) so one bad file does not
+        poison the rest of the batch.
+        
+        Args:
+            input_paths: Paths of documents to convert
+            output_dir: Directory for the PDFs
+            pool: Optional process pool; batches of POOL_BATCH_SIZE run concurrently
+            cancel_event: Optional threading.Event checked between pool batches
+                and while a local soffice batch is running
+            on_process: Optional callable given each local soffice Popen
+            
+        Returns:
+            Tuple of ({input_path: pdf_path}, {input_path: error message}).
+            Paths skipped because of cancellation appear in neither.
+        """
+        output_dir = str(Path(output_dir).absolute())
+        os.makedirs(output_dir, exist_ok=True)
+        input_paths = [str(Path(p).absolute()) for p in input_paths]
+        
+        if get_libreoffice_listener() is not None:
+            # The warm listener already avoids startup cost - convert one by one
+            failed_paths = input_paths
+        elif pool is not None:
+            failed_paths = self._pool_batch_to_pdf(input_paths, output_dir, pool, cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                failed_paths = []
+                input_paths = [
+                    p for p in input_paths
+                    if os.path.exists(os.path.join(output_dir, f"{Path(p).stem}.pdf"))
+                ]
+        else:
+            print(f"[LibreOffice] Batch converting {len(input_paths)} file(s) to PDF")
+            failed_paths = soffice_batch_to_pdf(input_paths, output_dir,
+                                                cancel_event=cancel_event, on_process=on_process)
+        
+        converted = {}
+        errors = {}
+        failed_set = set(failed_paths)
+        for path in input_paths:
+            if path not in failed_set:
+                converted[path] = os.path.join(output_dir, f"{Path(path).stem}.pdf")
+                continue
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                converted[path] = self.convert(path, 'pdf', output_dir,
+                                               cancel_event=cancel_event, on_process=on_process)
+            except Exception as e:
+                errors[path] = str(e)
+        
+        return converted, errors
+    
+    def _pool_batch_to_pdf(self, input_paths: List[str], output_dir: str, pool, cancel_event=None) -> List[str]:
+        """
+        Spread soffice batches over a process pool.
+        
+        Returns:
+            Input paths whose PDF was not produced
+        """
+        from concurrent.futures import as_completed
+        
+        chunks = [input_paths[i:i + POOL_BATCH_SIZE] for i in range(0, len(input_paths), POOL_BATCH_SIZE)]
+        print(f"[LibreOffice] Converting {len(input_paths)} file(s) to PDF in {len(chunks)} parallel batch(es)")
+        futures = {
+            pool.submit(soffice_batch_to_pdf, chunk, output_dir, 300, True): chunk
+            for chunk in chunks
+        }
+        
+        failed = []
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                # The pool is shared with other jobs - only drop this job's work
+                for pending in futures:
+                    pending.cancel()
+                break
+            try:
+                failed.extend(future.result())
+            except Exception as e:
+                print(f"[LibreOffice] Pool batch failed: {e}")
+                failed.extend(futures[future])
+        return failed
+    
     def batch_convert(self, input_paths: List[str], output_formats: List[str], output_dir: str) -> List[str]:
         """
         Convert multiple files to multiple formats.
@@ -3,30 +3,325 @@ Job Manager Service
 Manages job lifecycle, file operations, and output generation.
 """
 import os
-import json
 import zipfile
 import shutil
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import wait as futures_wait
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
-from models.job import Job, JobStatus
+from models.job import Job, JobStatus, JobType
 from services.file_tracker import FileTracker
 from services.document_parser import DocumentParser
 from services.template_processor import TemplateProcessor
 from services.format_converter import FormatConverter
+from utils.file_handlers import copy_files, list_files
+from utils.helpers import dump_json, load_json
+
+# Row-level progress journal shared by all jobs in JOBS_DIR
+JOBS_DB_NAME = "jobs.db"
+# Rows processed between full metadata.json snapshots of a running job
+SNAPSHOT_EVERY_ROWS = 500
+# Buffered row progress is committed every N rows or T seconds per job
+ROW_COMMIT_COUNT = 100
+ROW_COMMIT_INTERVAL = 1.0
+# Output directory archived into each job type's ZIP, relative to the job dir
+ARCHIVE_SUBDIRS = {JobType.SPLIT: Path('outputs', 'splits'), JobType.MERGE: Path('outputs', 'merged')}
+# Bytes read per file chunk and buffered per yielded chunk when streaming a ZIP
+ZIP_STREAM_CHUNK = 1024 * 1024
+
+
+class _ZipStreamBuffer:
+    """Write-only file object that collects ZipFile output between yields."""
+    
+    def __init__(self):
+        self.data = bytearray()
+    
+    def write(self, b):
+        self.data += b
+        return len(b)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        out = bytes(self.data)
+        self.data.clear()
+        return out
+
+
+def stream_zip_archive(source_dir, chunk_size: int = ZIP_STREAM_CHUNK):
+    """
+    Build a ZIP of a directory on the fly, yielding it in chunks.
+    
+    Same layout as JobManager._create_zip_archive, but nothing is written to
+    disk and the first bytes are available as soon as the first file has
+    been read. Deflate level 1 keeps compression from delaying the stream.
+    
+    Args:
+        source_dir: Directory to archive
+        chunk_size: Approximate size of each yielded chunk
+        
+    Yields:
+        Consecutive bytes of the ZIP file
+    """
+    buf = _ZipStreamBuffer()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        for root, dirs, files in os.walk(source_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                arcname = os.path.relpath(file_path, source_dir).replace(os.sep, '/')
+                force_zip64 = os.path.getsize(file_path) > zipfile.ZIP64_LIMIT
+                with open(file_path, 'rb') as src, zipf.open(arcname, 'w', force_zip64=force_zip64) as dst:
+                    while data := src.read(chunk_size):
+                        dst.write(data)
+                        if len(buf.data) >= chunk_size:
+                            yield buf.drain()
+    if buf.data:
+        yield buf.drain()
+
+
+class JobStore:
+    """
+    SQLite journal of job progress, opened in WAL mode.
+    
+    metadata.json remains the full snapshot of each job. Progress made since
+    the last snapshot is recorded here as small partial updates - one row per
+    processed data row plus the job's counters - so a running job never has
+    to rewrite its whole JSON document.
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Initialize JobStore.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                total_records INTEGER NOT NULL,
+                processed_records INTEGER NOT NULL,
+                failed_records INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_rows (
+                job_id TEXT NOT NULL,
+                row_idx INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                files_json TEXT NOT NULL,
+                PRIMARY KEY (job_id, row_idx)
+            );
+        ''')
+    
+    def record_progress(self, entries: List[Dict]):
+        """
+        Commit progress for one or more jobs in a single transaction.
+        
+        Args:
+            entries: Dicts with 'job' (counter tuple for the jobs table) and
+                'rows' (list of (job_id, row_idx, status, files_json) tuples)
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for entry in entries:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)', entry['job']
+                    )
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO job_rows VALUES (?, ?, ?, ?)', entry['rows']
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+    
+    def load_progress(self, job_id: str) -> Optional[Dict]:
+        """
+        Get the journaled progress of a job.
+        
+        Args:
+            job_id: Job ID
+            
+        Returns:
+            Dict with counters, 'updated_at' and 'files' (in row order), or None
+        """
+        with self._lock:
+            job_row = self._conn.execute(
+                'SELECT status, total_records, processed_records, failed_records, updated_at '
+                'FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            if job_row is None:
+                return None
+            file_rows = self._conn.execute(
+                'SELECT files_json FROM job_rows WHERE job_id = ? ORDER BY row_idx', (job_id,)
+            ).fetchall()
+        
+        files = []
+        for (files_json,) in file_rows:
+            files.extend(load_json(files_json))
+        return {
+            'status': job_row[0],
+            'total_records': job_row[1],
+            'processed_records': job_row[2],
+            'failed_records': job_row[3],
+            'updated_at': job_row[4],
+            'files': files
+        }
+    
+    def trim_job(self, job_id: str, snapshot_updated_at: str):
+        """
+        Drop a job's journaled progress once a snapshot covers it.
+        
+        Rows are only ever committed together with the job's counters, so
+        if the counters are no newer than the snapshot, neither are the rows.
+        Progress committed after the snapshot was taken is kept.
+        
+        Args:
+            job_id: Job ID
+            snapshot_updated_at: updated_at (isoformat) written in the snapshot
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                trimmed = self._conn.execute(
+                    'DELETE FROM jobs WHERE id = ? AND updated_at <= ?', (job_id, snapshot_updated_at)
+                ).rowcount
+                if trimmed:
+                    self._conn.execute('DELETE FROM job_rows WHERE job_id = ?', (job_id,))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+    
+    def clear_job(self, job_id: str):
+        """Remove all journaled progress for a job."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute('DELETE FROM job_rows WHERE job_id = ?', (job_id,))
+            self._conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+            self._conn.execute('COMMIT')
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class MetadataFlusher:
+    """
+    Group-commit writer for job progress.
+    
+    Progress from all running jobs is queued and written by one background
+    thread: each wake-up drains up to max_batch entries (or whatever arrives
+    within max_wait seconds), commits them in one transaction per JobStore -
+    a single fsync for the whole batch - then wakes the waiting callers.
+    """
+    
+    def __init__(self, max_batch: int = 1000, max_wait: float = 0.01):
+        """
+        Initialize MetadataFlusher.
+        
+        Args:
+            max_batch: Maximum entries written per group commit
+            max_wait: Seconds to wait for more entries before committing
+        """
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the flusher thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='metadata-flusher', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Flush queued entries and stop the flusher thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+    
+    def submit(self, store: JobStore, entry: Dict) -> threading.Event:
+        """
+        Queue a progress entry for a job store.
+        
+        Args:
+            store: JobStore to commit into
+            entry: Progress entry as accepted by JobStore.record_progress
+            
+        Returns:
+            Event set once the entry is committed
+        """
+        done = threading.Event()
+        self._queue.put((store, entry, done))
+        return done
+    
+    def _run(self):
+        """Flusher loop: collect a batch, commit it, repeat."""
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._commit(batch)
+    
+    def _commit(self, batch: List[tuple]):
+        """Commit a batch of entries, then signal their events."""
+        pending: Dict[int, tuple] = {}
+        for store, entry, _ in batch:
+            pending.setdefault(id(store), (store, []))[1].append(entry)
+        
+        for store, entries in pending.values():
+            try:
+                store.record_progress(entries)
+            except sqlite3.Error as e:
+                print(f"[MetadataFlusher] Error writing {store.db_path}: {str(e)}")
+        
+        for _, _, done in batch:
+            done.set()
 
 
 class JobManager:
     """Manages document generation jobs."""
     
-    def __init__(self, jobs_dir: str, storage_dir: str):
+    def __init__(self, jobs_dir: str, storage_dir: str, metadata_flusher: Optional[MetadataFlusher] = None,
+                 conversion_pool=None):
         """
         Initialize JobManager.
         
         Args:
             jobs_dir: Directory to store job data
             storage_dir: Directory for file tracking
+            metadata_flusher: Optional shared flusher for job progress (committed synchronously if None)
+            conversion_pool: Optional process pool for parallel PDF conversion
         """
         self.jobs_dir = Path(jobs_dir)
         self.storage_dir = Path(storage_dir)
@@ -37,39 +332,207 @@ class JobManager:
         self.document_parser = DocumentParser()
         self.template_processor = TemplateProcessor()
         self.format_converter = FormatConverter()
+        self.conversion_pool = conversion_pool
         
         self.jobs: Dict[str, Job] = {}
+        # Job directory Paths, built once per known job (see get_job_dir)
+        self._job_dirs: Dict[str, Path] = {}
+        
+        # Row progress journal, buffered per running job
+        self.job_store = JobStore(str(self.jobs_dir / JOBS_DB_NAME))
+        self.metadata_flusher = metadata_flusher
+        self._row_buffers: Dict[str, List[tuple]] = {}
+        self._row_buffer_started: Dict[str, float] = {}
+        self._progress_pending: Dict[str, threading.Event] = {}
+        self._progress_lock = threading.Lock()
+        
+        # Per-job change counters for long-polling clients
+        self._job_versions: Dict[str, int] = {}
+        self._job_changed = threading.Condition()
+        
         self._load_all_jobs()
     
     def _load_all_jobs(self):
-        """Load all jobs from disk."""
-        if not self.jobs_dir.exists():
+        """Load all jobs from disk: read every metadata.json, then restore them in one batch."""
+        try:
+            with os.scandir(self.jobs_dir) as entries:
+                job_dirs = [entry for entry in entries if entry.is_dir()]
+        except FileNotFoundError:
             return
         
-        for job_dir in self.jobs_dir.iterdir():
-            if job_dir.is_dir():
-                metadata_file = job_dir / "metadata.json"
-                if metadata_file.exists():
-                    try:
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            job_data = json.load(f)
-                            job = Job.from_dict(job_data)
-                            self.jobs[job.id] = job
-                    except Exception as e:
-                        print(f"Error loading job {job_dir.name}: {str(e)}")
+        rows = []
+        for job_dir in job_dirs:
+            try:
+                with open(os.path.join(job_dir.path, "metadata.json"), 'rb') as f:
+                    rows.append((job_dir.name, load_json(f.read())))
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"Error loading job {job_dir.name}: {str(e)}")
+        
+        try:
+            jobs = Job.from_dicts(job_data for _, job_data in rows)
+        except Exception:
+            # A malformed record - restore one at a time so only it is skipped
+            jobs = []
+            for name, job_data in rows:
+                try:
+                    jobs.append(Job.from_dict(job_data))
+                except Exception as e:
+                    print(f"Error loading job {name}: {str(e)}")
+        
+        for job in jobs:
+            try:
+                if job.zip_file_path and not os.path.isabs(job.zip_file_path):
+                    # Older metadata stored it relative to the data root
+                    job.zip_file_path = str(self.jobs_dir.parent / job.zip_file_path)
+                self._replay_progress(job)
+                self.jobs[job.id] = job
+            except Exception as e:
+                print(f"Error loading job {job.id}: {str(e)}")
+    
+    def _replay_progress(self, job: Job):
+        """
+        Apply journaled progress newer than the job's last snapshot.
+        
+        Args:
+            job: Job loaded from its metadata.json snapshot
+        """
+        progress = self.job_store.load_progress(job.id)
+        if progress is None or progress['updated_at'] <= job.updated_at.isoformat():
+            return  # The snapshot already includes it
+        
+        job.status = JobStatus(progress['status'])
+        job.total_records = progress['total_records']
+        job.processed_records = progress['processed_records']
+        job.failed_records = progress['failed_records']
+        for file_path in progress['files']:
+            job.add_output_file(file_path)
+        job.updated_at = datetime.fromisoformat(progress['updated_at'])
+    
+    def _bump_job_version(self, job_id: str):
+        """Advance the job's change counter and wake long-polling waiters."""
+        with self._job_changed:
+            self._job_versions[job_id] = self._job_versions.get(job_id, 0) + 1
+            self._job_changed.notify_all()
+    
+    def get_job_version(self, job_id: str) -> int:
+        """Get the job's current change counter."""
+        return self._job_versions.get(job_id, 0)
+    
+    def wait_for_job_change(self, job_id: str, token: int, timeout: float) -> int:
+        """
+        Block until the job's change counter moves away from token.
+        
+        Args:
+            job_id: Job ID
+            token: Change counter the caller last saw
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            Current change counter (equal to token on timeout)
+        """
+        with self._job_changed:
+            self._job_changed.wait_for(
+                lambda: self._job_versions.get(job_id, 0) != token or job_id not in self.jobs,
+                timeout=timeout
+            )
+            return self._job_versions.get(job_id, 0)
     
     def get_job_dir(self, job_id: str) -> Path:
         """Get the directory for a specific job."""
-        return self.jobs_dir / job_id
+        job_dir = self._job_dirs.get(job_id)
+        if job_dir is None:
+            job_dir = self.jobs_dir / job_id
+            # Only memoize real jobs - ids in request URLs are arbitrary
+            if job_id in self.jobs:
+                self._job_dirs[job_id] = job_dir
+        return job_dir
+    
+    def get_job_archive_dir(self, job: Job) -> Path:
+        """Get the directory whose contents make up a job's output ZIP."""
+        return self.get_job_dir(job.id) / ARCHIVE_SUBDIRS.get(job.job_type, 'outputs')
     
     def save_job_metadata(self, job: Job):
-        """Save job metadata to disk."""
+        """Save a full snapshot of job metadata to disk."""
         job_dir = self.get_job_dir(job.id)
         job_dir.mkdir(parents=True, exist_ok=True)
         
+        # Buffered rows are covered by the snapshot; let queued commits land
+        # first so the journal never looks newer than what it was replaced by
+        with self._progress_lock:
+            self._row_buffers.pop(job.id, None)
+            self._row_buffer_started.pop(job.id, None)
+            pending = self._progress_pending.pop(job.id, None)
+        if pending is not None:
+            pending.wait()
+        
+        snapshot = job.to_dict()
         metadata_file = job_dir / "metadata.json"
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(job.to_dict(), f, indent=2, ensure_ascii=False)
+        with open(metadata_file, 'wb') as f:
+            f.write(dump_json(snapshot, indent=True))
+        
+        # The snapshot now covers the journal - keep jobs.db from growing
+        # with every row of every job ever run
+        self.job_store.trim_job(job.id, snapshot['updated_at'])
+        
+        self._bump_job_version(job.id)
+    
+    def record_row_progress(self, job: Job, row: int, status: str, files: List[str]):
+        """
+        Buffer the outcome of one data row.
+        
+        Buffered rows are committed together every ROW_COMMIT_COUNT rows or
+        ROW_COMMIT_INTERVAL seconds, whichever comes first.
+        
+        Args:
+            job: Job instance
+            row: Index of the data row
+            status: 'processed' or 'failed'
+            files: Output files produced for the row
+        """
+        with self._progress_lock:
+            rows = self._row_buffers.setdefault(job.id, [])
+            rows.append((job.id, row, status, dump_json(files).decode('utf-8')))
+            started = self._row_buffer_started.setdefault(job.id, time.time())
+            due = len(rows) >= ROW_COMMIT_COUNT or time.time() - started >= ROW_COMMIT_INTERVAL
+        if due:
+            self.flush_job_progress(job)
+    
+    def flush_job_progress(self, job: Job) -> threading.Event:
+        """
+        Commit the job's buffered rows and current counters to the journal.
+        
+        With a metadata flusher attached the commit is grouped with other
+        jobs in the background; wait on the returned Event when durability
+        matters.
+        
+        Args:
+            job: Job instance
+            
+        Returns:
+            Event set once the progress is committed
+        """
+        with self._progress_lock:
+            rows = self._row_buffers.pop(job.id, [])
+            self._row_buffer_started.pop(job.id, None)
+            entry = {
+                'job': (job.id, job.status.value, job.total_records, job.processed_records,
+                        job.failed_records, job.updated_at.isoformat()),
+                'rows': rows
+            }
+            if self.metadata_flusher is not None:
+                done = self.metadata_flusher.submit(self.job_store, entry)
+                self._progress_pending[job.id] = done
+            else:
+                done = None
+        
+        if done is None:
+            self.job_store.record_progress([entry])
+            done = threading.Event()
+            done.set()
+        self._bump_job_version(job.id)
+        return done
     
     def create_job(
         self,
@@ -140,6 +603,7 @@ class JobManager:
             if templates and len(templates) > 0:
                 # Process multiple templates
                 processed_templates = []
+                copies = []
                 for idx, tmpl in enumerate(templates):
                     tmpl_path = tmpl.get('path')
                     if not tmpl_path or not os.path.exists(tmpl_path):
@@ -150,7 +614,7 @@ class JobManager:
                     
                     # Copy to job directory
                     job_template_path = job_dir / f"template_{idx}{Path(tmpl_path).suffix}"
-                    shutil.copy2(template_info['local_path'], job_template_path)
+                    copies.append((template_info['local_path'], job_template_path))
                     
                     # Store template info
                     processed_templates.append({
@@ -162,6 +626,8 @@ class JobManager:
                         'local_path': template_info['local_path']
                     })
                 
+                copy_files(*copies)
+                
                 # Sort by priority
                 processed_templates.sort(key=lambda x: x['priority'])
                 job.metadata['templates'] = processed_templates
@@ -179,7 +645,7 @@ class JobManager:
                     
                     # Copy files to job directory for processing
                     job_template_path = job_dir / f"template{Path(template_path).suffix}"
-                    shutil.copy2(job.local_template_path, job_template_path)
+                    copy_files((job.local_template_path, job_template_path))
                     job.metadata['job_template_path'] = str(job_template_path)
             
             # Track data file
@@ -188,7 +654,7 @@ class JobManager:
             job.local_data_path = data_info['local_path']
             
             job_data_path = job_dir / f"data{Path(data_path).suffix}"
-            shutil.copy2(job.local_data_path, job_data_path)
+            copy_files((job.local_data_path, job_data_path))
             job.metadata['job_data_path'] = str(job_data_path)
             
         except Exception as e:
@@ -241,7 +707,16 @@ class JobManager:
                 job._cancel_event.set()
                 # Wait up to 5 seconds for cancellation
                 if hasattr(job, '_thread') and job._thread:
-                    job._thread.join(timeout=5.0)
+                    futures_wait([job._thread], timeout=5.0)
+        
+        # Drop journaled progress
+        with self._progress_lock:
+            self._row_buffers.pop(job_id, None)
+            self._row_buffer_started.pop(job_id, None)
+            pending = self._progress_pending.pop(job_id, None)
+        if pending is not None:
+            pending.wait(timeout=5.0)
+        self.job_store.clear_job(job_id)
         
         # Delete job directory with retry logic
         job_dir = self.get_job_dir(job_id)
@@ -282,6 +757,8 @@ class JobManager:
         
         # Remove from memory
         del self.jobs[job_id]
+        self._job_dirs.pop(job_id, None)
+        self._bump_job_version(job_id)
         
         return {'success': True}
     
@@ -301,7 +778,7 @@ class JobManager:
             raise ValueError(f"Job not found: {job_id}")
         
         # Allow reprocessing of failed jobs (for testing and recovery)
-        if job.status not in [JobStatus.PENDING, JobStatus.FAILED]:
+        if job.status not in (JobStatus.PENDING, JobStatus.FAILED):
             raise ValueError(f"Job {job_id} cannot be processed (status: {job.status.value})")
         
         job.update_status(JobStatus.PROCESSING)
@@ -309,8 +786,6 @@ class JobManager:
         
         try:
             # Delegate to appropriate processor based on job type
-            from models.job import JobType
-            
             if job.job_type == JobType.SPLIT:
                 return self._process_split_job(job)
             elif job.job_type == JobType.MERGE:
@@ -379,14 +854,22 @@ class JobManager:
             print(f"[JobManager] Data rows available: {len(data_result['data'])}")
             
             # Create output directory
-            output_dir = self.get_job_dir(job.id) / "outputs"
+            output_dir = self.get_job_archive_dir(job)
             output_dir.mkdir(parents=True, exist_ok=True)
             
-            # Initialize for batched saves
-            last_save_time = time.time()
-            save_interval = 5  # Save every 5 seconds
-            save_count = 10  # Or every 10 rows
-            rows_since_save = 0
+            # Fresh run - forget progress journaled by an earlier attempt
+            self.job_store.clear_job(job.id)
+            
+            # Word->PDF conversions are buffered and flushed in batches so one
+            # soffice invocation serves many rows
+            pending_pdfs = []
+            pdf_batch_size = 10
+            pdf_batch_interval = 30
+            pdf_batch_started = None
+            
+            # Output base name -> row index, so merged PDFs follow row order
+            # rather than filename order (processed_10 sorts before processed_2)
+            row_order = {}
             
             # Process each data row
             for idx, row_data in enumerate(data_result['data'], start=1):
@@ -402,6 +885,9 @@ class JobManager:
                     print(f"[JobManager] First row data keys: {list(row_data.keys())}")
                     print(f"[JobManager] First row data sample: {dict(list(row_data.items())[:3])}")
                 
+                row_deferred = False
+                row_status = 'failed'
+                files_before = len(job.output_files)
                 try:
                     # Determine output filename
                     # Check for ##filename## variable or custom filename variable in job metadata
@@ -423,6 +909,7 @@ class JobManager:
                         base_filename = custom_filename
                     else:
                         base_filename = f"processed_{idx}"
+                    row_order.setdefault(base_filename, idx)
                     
                     # Check if using multi-template mode
                     templates_list = job.metadata.get('templates', [])
@@ -568,7 +1055,8 @@ class JobManager:
                                         str(doc_path),
                                         output_format,
                                         str(format_dir),
-                                        print_settings
+                                        print_settings,
+                                        **self._conversion_hooks(job)
                                     )
                                     
                                     if not os.path.exists(temp_output):
@@ -625,12 +1113,21 @@ class JobManager:
                                     print_settings = job.excel_print_settings
                                     print(f"Row {idx}: Using Excel print settings for PDF conversion")
                             
+                            if output_format == 'pdf' and self.format_converter.can_batch_to_pdf(str(processed_doc)):
+                                # Converted (and counted) when the batch is flushed
+                                pending_pdfs.append({'row': idx, 'path': str(processed_doc), 'output_dir': str(format_dir)})
+                                if pdf_batch_started is None:
+                                    pdf_batch_started = time.time()
+                                row_deferred = True
+                                continue
+                            
                             try:
                                 output_file = self.format_converter.convert(
                                     str(processed_doc),
                                     output_format,
                                     str(format_dir),
-                                    print_settings
+                                    print_settings,
+                                    **self._conversion_hooks(job)
                                 )
                                 
                                 if not os.path.exists(output_file):
@@ -655,8 +1152,12 @@ class JobManager:
                                     job.error_message += f"\n\n{error_detail}"
                                 raise
                     
-                    job.increment_processed()
-                    print(f"Row {idx}: Completed successfully")
+                    if not row_deferred:
+                        job.increment_processed()
+                        row_status = 'processed'
+                        print(f"Row {idx}: Completed successfully")
+                    else:
+                        pending_pdfs[-1]['files'] = job.output_files[files_before:]
                     
                 except Exception as e:
                     # Error already logged with full details in inner exception handler
@@ -664,28 +1165,40 @@ class JobManager:
                     print(f"\n{'='*80}")
                     print(f"[JobManager] Row {idx} processing failed - error details captured above")
                     print(f"{'='*80}\n")
+                    # Drop this row's queued PDF so the flush doesn't count it again
+                    if row_deferred and pending_pdfs and pending_pdfs[-1]['row'] == idx:
+                        pending_pdfs.pop()
+                    row_deferred = False
                     job.increment_failed()
                     # Error message already set in inner exception handler with full debug log
                     # Don't overwrite or duplicate it here
                 
-                # Batched metadata saves: save every 10 rows or every 5 seconds
-                rows_since_save += 1
-                current_time = time.time()
-                if rows_since_save >= save_count or (current_time - last_save_time) >= save_interval:
+                if not row_deferred:
+                    self.record_row_progress(job, idx, row_status, job.output_files[files_before:])
+                
+                # Flush buffered PDF conversions every 10 documents or 30 seconds
+                if pending_pdfs and (len(pending_pdfs) >= pdf_batch_size
+                                     or time.time() - pdf_batch_started >= pdf_batch_interval):
+                    self._flush_pdf_batch(job, pending_pdfs)
+                    pending_pdfs = []
+                    pdf_batch_started = None
+                
+                # Row progress is journaled as it goes; full snapshot every 500 rows
+                if idx % SNAPSHOT_EVERY_ROWS == 0:
                     self.save_job_metadata(job)
-                    rows_since_save = 0
-                    last_save_time = current_time
             
-            # Final save after loop completes
-            self.save_job_metadata(job)
+            if pending_pdfs:
+                self._flush_pdf_batch(job, pending_pdfs)
+            
+            # Commit final progress; the snapshot is written once the job completes
+            self.flush_job_progress(job)
             
             # Validate that we have output files
             if job.processed_records == 0:
                 raise RuntimeError("No records were processed successfully")
             
-            # Verify output directory has files
-            output_files_exist = any(output_dir.rglob('*.*'))
-            if not output_files_exist:
+            # Verify output directory has files (stops at the first one)
+            if not list_files(output_dir, limit=1):
                 raise RuntimeError(f"No output files were generated in {output_dir}")
             
             # Handle PDF merging if pdf_merged format was requested
@@ -718,7 +1231,8 @@ class JobManager:
                                 str(processed_file),
                                 'pdf',
                                 str(temp_pdf_dir),
-                                print_settings
+                                print_settings,
+                                **self._conversion_hooks(job)
                             )
                             print(f"Job {job.id}: Created PDF for merging: {output_file}")
                         except Exception as e:
@@ -727,7 +1241,7 @@ class JobManager:
                             traceback.print_exc()
                 
                 print(f"Job {job.id}: Merging PDF files...")
-                self._merge_pdfs(output_dir, job)
+                self._merge_pdfs(output_dir, job, row_order)
             
             # Handle Excel workbook merging if excel_workbook format was requested
             if 'excel_workbook' in job.output_formats:
@@ -807,6 +1321,61 @@ class JobManager:
         self.save_job_metadata(job)
         return job
     
+    def _conversion_hooks(self, job: Job) -> Dict:
+        """
+        Build the cancellation arguments for FormatConverter calls made for a job.
+        
+        The running soffice child's pid is kept on job._soffice_pid so the
+        cancel endpoint can stop it without waiting for the next poll.
+        
+        Args:
+            job: Job instance
+            
+        Returns:
+            Keyword arguments for convert() / convert_batch_to_pdf()
+        """
+        def on_process(process):
+            job._soffice_pid = process.pid if process is not None else None
+        
+        return {'cancel_event': job._cancel_event, 'on_process': on_process}
+    
+    def _flush_pdf_batch(self, job: Job, pending: List[Dict]):
+        """
+        Convert buffered rows to PDF in one batch and record the results.
+        
+        Args:
+            job: Job instance
+            pending: Queued rows as {'row', 'path', 'output_dir'} dicts
+        """
+        by_dir = {}
+        for entry in pending:
+            by_dir.setdefault(entry['output_dir'], []).append(entry)
+        
+        for output_dir, entries in by_dir.items():
+            converted, errors = self.format_converter.convert_batch_to_pdf(
+                [entry['path'] for entry in entries],
+                output_dir,
+                pool=self.conversion_pool,
+                **self._conversion_hooks(job)
+            )
+            for entry in entries:
+                path = str(Path(entry['path']).absolute())
+                if path in converted:
+                    job.add_output_file(converted[path])
+                    job.increment_processed()
+                    self.record_row_progress(job, entry['row'], 'processed',
+                                             entry.get('files', []) + [converted[path]])
+                    print(f"Row {entry['row']}: Completed successfully")
+                elif path in errors:
+                    error_detail = f"Row {entry['row']}: Error converting to pdf:\n{errors.get(path, 'Unknown error')}"
+                    print(error_detail)
+                    if not job.error_message:
+                        job.error_message = error_detail
+                    else:
+                        job.error_message += f"\n\n{error_detail}"
+                    job.increment_failed()
+                    self.record_row_progress(job, entry['row'], 'failed', entry.get('files', []))
+    
     def _create_zip_archive(self, source_dir: Path, zip_path: Path):
         """Create a ZIP archive from a directory."""
         if not source_dir.exists():
@@ -852,7 +1421,7 @@ class JobManager:
                 raise ValueError("Input file path not found")
             
             # Create output directory
-            output_dir = self.get_job_dir(job.id) / "outputs" / "splits"
+            output_dir = self.get_job_archive_dir(job)
             output_dir.mkdir(parents=True, exist_ok=True)
             
             # Determine file type
@@ -930,7 +1499,7 @@ class JobManager:
             directory_path = merge_config.get('directory_path')
             
             # Create output directory
-            output_dir = self.get_job_dir(job.id) / "outputs" / "merged"
+            output_dir = self.get_job_archive_dir(job)
             output_dir.mkdir(parents=True, exist_ok=True)
             
             print(f"Starting merge job: {merge_mode} mode")
@@ -1052,16 +1621,8 @@ class JobManager:
         if not job:
             return None
         
-        if not job.zip_file_path:
-            return None
-        
-        # Ensure the path is absolute
-        zip_path = Path(job.zip_file_path)
-        if not zip_path.is_absolute():
-            # Convert relative path to absolute
-            zip_path = self.jobs_dir.parent / job.zip_file_path
-        
-        return str(zip_path)
+        # Stored absolute by Job.set_zip_file (legacy relative paths fixed at load)
+        return job.zip_file_path
     
     def check_and_update_files(self, job_id: str) -> Dict:
         """
@@ -1103,15 +1664,19 @@ class JobManager:
         
         return updates
     
-    def _merge_pdfs(self, output_dir: Path, job: Job):
+    def _merge_pdfs(self, output_dir: Path, job: Job, row_order: Optional[Dict[str, int]] = None):
         """
         Merge all PDF files from the pdf directory into a single merged.pdf.
         
+        Pages are appended to one PdfWriter and the result is written once.
+        
         Args:
             output_dir: Output directory containing format subdirectories
             job: Job instance
+            row_order: Optional {output base name: row index}; PDFs are merged
+                in row order, with unknown files last by name
         """
-        from PyPDF2 import PdfMerger
+        from PyPDF2 import PdfWriter
         
         # Check if we have individual PDFs to merge
         pdf_dir = output_dir / 'pdf'
@@ -1119,8 +1684,12 @@ class JobManager:
             print(f"Job {job.id}: No PDF directory found to merge")
             return
         
-        # Get all PDF files sorted by name
-        pdf_files = sorted(pdf_dir.glob('*.pdf'))
+        # Get all PDF files in row order
+        row_order = row_order or {}
+        pdf_files = sorted(
+            pdf_dir.glob('*.pdf'),
+            key=lambda p: (row_order.get(p.stem, float('inf')), p.name)
+        )
         if not pdf_files:
             print(f"Job {job.id}: No PDF files found to merge")
             return
@@ -1131,16 +1700,17 @@ class JobManager:
         merged_file = merged_dir / 'merged.pdf'
         
         try:
-            # Create merger and add all PDFs
-            merger = PdfMerger()
+            # Build the merged document in memory and write it in one pass
+            writer = PdfWriter()
             
             for pdf_file in pdf_files:
                 print(f"Job {job.id}: Adding {pdf_file.name} to merged PDF")
-                merger.append(str(pdf_file))
+                writer.append(str(pdf_file))
             
             # Write merged PDF
-            merger.write(str(merged_file))
-            merger.close()
+            with open(merged_file, 'wb') as f:
+                writer.write(f)
+            writer.close()
             
             # Verify merged file was created
             if not merged_file.exists():
@@ -1167,21 +1737,22 @@ class JobManager:
             output_path: Path for merged output file
             job: Job instance
         """
-        from PyPDF2 import PdfMerger
+        from PyPDF2 import PdfWriter
         
         # Sort by priority
         sorted_pdfs = sorted(pdf_list, key=lambda x: x['priority'])
         
         try:
-            merger = PdfMerger()
+            writer = PdfWriter()
             
             for pdf_info in sorted_pdfs:
                 pdf_path = pdf_info['path']
                 if os.path.exists(pdf_path):
-                    merger.append(str(pdf_path))
+                    writer.append(str(pdf_path))
             
-            merger.write(str(output_path))
-            merger.close()
+            with open(output_path, 'wb') as f:
+                writer.write(f)
+            writer.close()
             
             print(f"Job {job.id}: Merged {len(sorted_pdfs)} template PDFs into {output_path.name}")
             
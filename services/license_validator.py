@@ -3,9 +3,25 @@ License Validation Service
 Validates application license against remote server.
 """
 import hashlib
+import hmac
+import json
+import os
+import platform
+import threading
+import time
+import uuid
 import requests
-from typing import Tuple
+from pathlib import Path
+from typing import Optional, Tuple
 import sys
+from config.config import Config
+
+# A successful check is trusted for this long before the next start blocks on the network
+LICENSE_CACHE_TTL = 24 * 60 * 60
+# Offline starts keep working this long after the last successful check
+LICENSE_GRACE_PERIOD = 7 * 24 * 60 * 60
+# Clock difference tolerated before a cached check counts as from the future
+LICENSE_CLOCK_SKEW = 5 * 60
 
 def safe_print(text):
     """Print text safely, handling encoding errors."""
@@ -18,20 +34,126 @@ def safe_print(text):
 class LicenseValidator:
     """Validates application license."""
     
-    def __init__(self):
-        """Initialize license validator."""
+    def __init__(self, cache_path: Optional[str] = None):
+        """
+        Initialize license validator.
+        
+        Args:
+            cache_path: Where the last successful check is recorded
+                (default: STORAGE_DIR/.license_cache)
+        """
         self.base_url = "https://alemxral.github.io/cv"
         self.timeout = 10
         # Fixed hash for all installations
         self.hash = "das_license_2025"
+        self.cache_path = Path(cache_path) if cache_path else Path(Config.STORAGE_DIR) / '.license_cache'
     
     def validate(self) -> Tuple[bool, str]:
+        """
+        Validate license, trusting a recent successful check.
+        
+        A check cached less than LICENSE_CACHE_TTL ago is accepted at once and
+        re-checked on a background thread, so startup does not wait on the
+        network. Otherwise the server is asked; if it cannot be reached, the
+        cached result is still accepted until its grace period runs out.
+        
+        Returns:
+            Tuple of (is_valid, message)
+        """
+        cached = self._read_cache()
+        now = time.time()
+        
+        if cached and now - cached['validated_at'] < LICENSE_CACHE_TTL:
+            safe_print("[License] [OK] Using cached validation, re-checking in background")
+            threading.Thread(target=self._revalidate, name='license-revalidate', daemon=True).start()
+            return True, "License valid (cached)"
+        
+        is_valid, message, reachable = self._check_remote()
+        if is_valid:
+            self._write_cache(now)
+        elif not reachable and cached and now < cached['grace_until']:
+            safe_print("[License] [OK] Server unreachable, within offline grace period")
+            return True, "License valid (offline grace period)"
+        elif reachable:
+            self._clear_cache()
+        return is_valid, message
+    
+    def _revalidate(self):
+        """Re-check the license and refresh or drop the cached result."""
+        is_valid, _, reachable = self._check_remote()
+        if is_valid:
+            self._write_cache(time.time())
+        elif reachable:
+            # Denied by the server: the next start has to check again
+            self._clear_cache()
+    
+    def _cache_signature(self, validated_at: float) -> str:
+        """
+        HMAC of a cached validation, keyed to this machine.
+        
+        The key is derived from the MAC address and host name, so a cache
+        file edited by hand or copied from another machine is rejected.
+        
+        Args:
+            validated_at: Time of the successful check
+            
+        Returns:
+            Hex digest
+        """
+        machine = f"{uuid.getnode()}|{platform.node()}|{self.hash}".encode('utf-8')
+        key = hashlib.sha256(machine).digest()
+        return hmac.new(key, f"{self.hash}|{validated_at!r}".encode('utf-8'), hashlib.sha256).hexdigest()
+    
+    def _read_cache(self) -> Optional[dict]:
+        """Load the cached validation for this hash, or None if absent, tampered with or from the future."""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('hash') != self.hash:
+                return None
+            validated_at = float(cached['validated_at'])
+            if not hmac.compare_digest(str(cached['signature']), self._cache_signature(validated_at)):
+                return None
+            if validated_at > time.time() + LICENSE_CLOCK_SKEW:
+                return None
+            # Derived, not read back - only validated_at is signed
+            cached['validated_at'] = validated_at
+            cached['grace_until'] = validated_at + LICENSE_GRACE_PERIOD
+            return cached
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+    
+    def _write_cache(self, validated_at: float):
+        """Record a successful validation (written atomically)."""
+        data = {
+            'hash': self.hash,
+            'validated_at': validated_at,
+            'grace_until': validated_at + LICENSE_GRACE_PERIOD,
+            'signature': self._cache_signature(validated_at)
+        }
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            safe_print(f"[License] [WARNING] Could not write cache: {e}")
+    
+    def _clear_cache(self):
+        """Forget the cached validation."""
+        try:
+            os.remove(self.cache_path)
+        except OSError:
+            pass
+    
+    def _check_remote(self) -> Tuple[bool, str, bool]:
         """
         Validate license against remote server.
         Simple ping: if URL returns 200, license is valid.
         
         Returns:
-            Tuple of (is_valid, message)
+            Tuple of (is_valid, message, server_reachable)
         """
         try:
             url = f"{self.base_url}/{self.hash}.txt"
@@ -42,18 +164,17 @@ class LicenseValidator:
             
             if response.status_code == 200:
                 safe_print(f"[License] [OK] Access granted (HTTP 200)")
-                return True, "License valid"
+                return True, "License valid", True
             else:
                 safe_print(f"[License] [DENIED] Access denied (HTTP {response.status_code})")
-                return False, "Service not available"
+                return False, "Service not available", True
                 
         except requests.exceptions.Timeout:
             safe_print(f"[License] [ERROR] Timeout")
-            return False, "Service not available - timeout"
+            return False, "Service not available - timeout", False
         except requests.exceptions.ConnectionError:
             safe_print(f"[License] [ERROR] Connection error")
-            return False, "Service not available - no connection"
+            return False, "Service not available - no connection", False
         except Exception as e:
             safe_print(f"[License] [ERROR] Error: {e}")
-            return False, f"Service not available"
-
+            return False, f"Service not available", False
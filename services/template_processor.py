@@ -4,8 +4,12 @@ Processes templates in Word, Excel, and .msg formats with placeholder substituti
 """
 import os
 import re
+import threading
+import zipfile
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
 import shutil
 from utils.file_handlers import open_workbook_safe
 
@@ -35,12 +39,21 @@ class TemplateProcessor:
     """Processes templates with placeholder substitution."""
     
     VARIABLE_PATTERN = re.compile(r'##([^#]+)##')
+    # Parts of a .docx that hold body, header and footer text
+    DOCX_TEXT_PARTS = re.compile(r'^word/(document|header\d*|footer\d*)\.xml$')
+    # Values python-docx would turn into <w:br/>/<w:tab/> or reject outright, or
+    # whose edge spaces Word drops without xml:space="preserve"
+    XML_UNSAFE_VALUE = re.compile(r'[\x00-\x1f]|^ | $')
+    # Raw .docx packages kept for byte substitution, most recently used last
+    DOCX_PARTS_CACHE_SIZE = 16
     
     def __init__(self):
         """Initialize TemplateProcessor."""
         self.supported_formats = ['.docx', '.xlsx', '.msg']
         # Template caches for document templates only (not workbooks)
         self._docx_cache = {}
+        self._docx_parts_cache = OrderedDict()
+        self._docx_parts_lock = threading.Lock()
         print("[TemplateProcessor] Initialized")
     
     def is_supported_format(self, file_path: str) -> bool:
@@ -186,11 +199,89 @@ class TemplateProcessor:
                     if placeholder in run.text:
                         run.text = run.text.replace(placeholder, str(value))
     
+    def _load_docx_parts(self, template_path: str) -> Optional[Dict]:
+        """
+        Read a .docx into memory as raw zip members for byte-level substitution.
+        
+        Args:
+            template_path: Path to Word template
+            
+        Returns:
+            Dict with 'members' [(ZipInfo, bytes)] and 'text_parts', or None if
+            the file doesn't look like a regular Word package
+        """
+        try:
+            with zipfile.ZipFile(template_path) as zf:
+                members = [(info, zf.read(info.filename)) for info in zf.infolist()]
+        except zipfile.BadZipFile:
+            return None
+        
+        text_parts = frozenset(
+            info.filename for info, _ in members if self.DOCX_TEXT_PARTS.match(info.filename)
+        )
+        if 'word/document.xml' not in text_parts:
+            return None
+        return {'members': members, 'text_parts': text_parts}
+    
+    def _get_docx_parts(self, template_path: str) -> Optional[Dict]:
+        """Return the parsed package for a template from the LRU, reloading it when the file changes."""
+        stat = os.stat(template_path)
+        key = (template_path, stat.st_mtime_ns, stat.st_size)
+        with self._docx_parts_lock:
+            if key in self._docx_parts_cache:
+                self._docx_parts_cache.move_to_end(key)
+                return self._docx_parts_cache[key]
+        parts = self._load_docx_parts(template_path)
+        with self._docx_parts_lock:
+            self._docx_parts_cache[key] = parts
+            while len(self._docx_parts_cache) > self.DOCX_PARTS_CACHE_SIZE:
+                self._docx_parts_cache.popitem(last=False)
+        return parts
+    
+    def _render_docx_parts(self, parts: Dict, data: Dict, output_path: str):
+        """
+        Write a filled-in copy of a cached .docx by replacing placeholders in the XML bytes.
+        
+        Only placeholders stored contiguously inside one text run are present in
+        the XML verbatim, which is the same set the run-based path replaces.
+        Quotes are escaped too, since placeholders can sit inside attributes.
+        """
+        entities = {'"': '&quot;'}
+        replacements = []
+        for var_name, value in data.items():
+            placeholder = f"##{var_name}##"
+            value = escape(str(value), entities).encode('utf-8')
+            # Text nodes keep " as-is while attributes store it as &quot;
+            for marker in {escape(placeholder), escape(placeholder, entities)}:
+                replacements.append((marker.encode('utf-8'), value))
+        
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for info, content in parts['members']:
+                if info.filename in parts['text_parts']:
+                    for placeholder, value in replacements:
+                        if placeholder in content:
+                            content = content.replace(placeholder, value)
+                # Fresh ZipInfo per write - the cached one is shared across threads
+                member = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                member.compress_type = info.compress_type
+                member.external_attr = info.external_attr
+                zf.writestr(member, content)
+    
     def _process_docx_template(self, template_path: str, data: Dict, output_path: str) -> str:
         """Process Word template with caching for performance."""
         if Document is None:
             raise ImportError("python-docx is required for Word templates")
         
+        # Fast path: substitute directly in the cached XML bytes, skipping the
+        # python-docx object graph entirely
+        parts = self._get_docx_parts(template_path)
+        if parts is not None and not any(
+            self.XML_UNSAFE_VALUE.search(str(value)) for value in data.values()
+        ):
+            self._render_docx_parts(parts, data, output_path)
+            return output_path
+        
         # Load from cache or disk (5-10ms vs 50-200ms per load)
         if template_path not in self._docx_cache:
             print(f"[TemplateProcessor] Caching Word template: {Path(template_path).name}")
@@ -375,7 +466,7 @@ class TemplateProcessor:
             # Replace in HTML body
             if msg.HTMLBody:
                 for var_name, value in data.items():
-                    placeholder = f"#{var_name}##"
+                    placeholder = f"##{var_name}##"
                     msg.HTMLBody = msg.HTMLBody.replace(placeholder, str(value))
             
             # Save the message
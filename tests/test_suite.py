@@ -5,11 +5,16 @@ Excel auto-adjust, and variable substitution.
 """
 import pytest
 import os
+import json
 import time
+from datetime import datetime
 from pathlib import Path
 from openpyxl import Workbook, load_workbook
 from docx import Document
 
+from services.job_manager import JobManager, MetadataFlusher, stream_zip_archive
+from models.job import Job, JobStatus
+
 
 class TestTemplateProcessor:
     """Test suite for TemplateProcessor class."""
@@ -272,6 +277,104 @@ class TestTemplateProcessor:
         
         # Cache should provide some speedup
         assert time2 <= time1, "Caching did not improve performance"
+    
+    def test_docx_byte_substitution(self, template_processor, output_dir):
+        """Test placeholders in tables, headers and footers are filled from cached XML."""
+        template_path = output_dir / "byte_template.docx"
+        doc = Document()
+        doc.add_paragraph('Dear ##name##,')
+        table = doc.add_table(rows=1, cols=1)
+        table.rows[0].cells[0].text = 'Company: ##company##'
+        doc.sections[0].header.paragraphs[0].text = 'Header ##name##'
+        doc.sections[0].footer.paragraphs[0].text = 'Footer ##company##'
+        doc.save(str(template_path))
+        
+        output_path = output_dir / "byte_output.docx"
+        template_processor.process_template(
+            str(template_path),
+            {'name': 'A & B <Ltd>', 'company': 'Acme'},
+            str(output_path)
+        )
+        
+        result = Document(str(output_path))
+        assert result.paragraphs[0].text == 'Dear A & B <Ltd>,'
+        assert result.tables[0].rows[0].cells[0].text == 'Company: Acme'
+        assert result.sections[0].header.paragraphs[0].text == 'Header A & B <Ltd>'
+        assert result.sections[0].footer.paragraphs[0].text == 'Footer Acme'
+    
+    def test_docx_multiline_value_uses_document_path(self, template_processor, output_dir):
+        """Test values with line breaks still become Word line breaks."""
+        template_path = output_dir / "multiline_template.docx"
+        doc = Document()
+        doc.add_paragraph('Address: ##address##')
+        doc.save(str(template_path))
+        
+        output_path = output_dir / "multiline_output.docx"
+        template_processor.process_template(
+            str(template_path),
+            {'address': 'Line 1\nLine 2'},
+            str(output_path)
+        )
+        
+        result = Document(str(output_path))
+        assert result.paragraphs[0].text == 'Address: Line 1\nLine 2'
+    
+    def test_docx_parts_cache_tracks_template_changes(self, template_processor, output_dir):
+        """Test an edited template is re-read and the raw package cache stays bounded."""
+        template_path = output_dir / "edited_template.docx"
+        output_path = output_dir / "edited_output.docx"
+        for greeting in ('Hello', 'Goodbye, dear'):
+            doc = Document()
+            doc.add_paragraph(f'{greeting} ##name##')
+            doc.save(str(template_path))
+            template_processor.process_template(str(template_path), {'name': 'Ann'}, str(output_path))
+            assert Document(str(output_path)).paragraphs[0].text == f'{greeting} Ann'
+    
+        assert len(template_processor._docx_parts_cache) <= template_processor.DOCX_PARTS_CACHE_SIZE
+    
+    def test_docx_quoted_value_in_attribute(self, template_processor, output_dir):
+        """Test quotes in values keep placeholders inside XML attributes well-formed."""
+        from docx.oxml import parse_xml
+        from docx.oxml.ns import nsdecls, qn
+    
+        template_path = output_dir / "attribute_template.docx"
+        doc = Document()
+        para = doc.add_paragraph('Title: ##title##')
+        para._p.append(parse_xml(
+            f'<w:fldSimple {nsdecls("w")} w:instr="TITLE ##title##"><w:r><w:t>x</w:t></w:r></w:fldSimple>'
+        ))
+        doc.save(str(template_path))
+    
+        output_path = output_dir / "attribute_output.docx"
+        template_processor.process_template(
+            str(template_path),
+            {'title': 'The "Best" Offer'},
+            str(output_path)
+        )
+    
+        result = Document(str(output_path))
+        field = result.paragraphs[0]._p.xpath('./w:fldSimple')[0]
+        assert result.paragraphs[0].text.startswith('Title: The "Best" Offer')
+        assert field.get(qn('w:instr')) == 'TITLE The "Best" Offer'
+    
+    def test_docx_padded_value_keeps_spaces(self, template_processor, output_dir):
+        """Test values with leading or trailing spaces keep them in Word."""
+        template_path = output_dir / "padded_template.docx"
+        doc = Document()
+        doc.add_paragraph('##code##')
+        doc.save(str(template_path))
+    
+        output_path = output_dir / "padded_output.docx"
+        template_processor.process_template(
+            str(template_path),
+            {'code': '  A1 '},
+            str(output_path)
+        )
+    
+        result = Document(str(output_path))
+        text_node = result.paragraphs[0]._p.xpath('.//w:t')[0]
+        assert text_node.text == '  A1 '
+        assert text_node.get('{http://www.w3.org/XML/1998/namespace}space') == 'preserve'
 
 
 class TestFormatConverter:
@@ -333,6 +436,104 @@ class TestFormatConverter:
             # Should raise appropriate error
             error_msg = str(e).lower()
             assert "not supported" in error_msg or "error" in error_msg or "cannot convert" in error_msg
+    
+    def test_word_classifier(self, format_converter, output_dir):
+        """Test only text-only Word documents are routed to the ReportLab renderer."""
+        from docx.shared import Inches
+        from services.format_converter import WordTemplateClassifier
+        
+        simple_path = output_dir / "simple.docx"
+        doc = Document()
+        doc.add_heading('Letter', 1)
+        doc.add_paragraph('Dear John,').runs[0].bold = True
+        doc.save(str(simple_path))
+        
+        table_path = output_dir / "with_table.docx"
+        doc = Document()
+        doc.add_paragraph('Totals')
+        doc.add_table(rows=2, cols=2)
+        doc.save(str(table_path))
+        
+        indent_path = output_dir / "with_indent.docx"
+        doc = Document()
+        doc.add_paragraph('Indented').paragraph_format.left_indent = Inches(1)
+        doc.save(str(indent_path))
+        
+        unicode_path = output_dir / "non_latin1.docx"
+        doc = Document()
+        doc.add_paragraph('Łódź – 東京')
+        doc.save(str(unicode_path))
+        
+        classifier = format_converter.word_classifier
+        assert classifier.is_simple(str(simple_path)), "Plain document classified as complex"
+        assert not classifier.is_simple(str(table_path)), "Table document classified as simple"
+        assert not classifier.is_simple(str(indent_path)), "Indented document classified as simple"
+        assert not classifier.is_simple(str(unicode_path)), "Non-Latin-1 document classified as simple"
+        assert not WordTemplateClassifier.classify_xml(
+            b'<w:body><w:hyperlink r:id="rId4"><w:r><w:t>site</w:t></w:r></w:hyperlink></w:body>'
+        ), "Hyperlink classified as simple"
+    
+    def test_reportlab_word_to_pdf(self, output_dir):
+        """Test ReportLab rendering keeps the document text."""
+        from PyPDF2 import PdfReader
+        from services.format_converter import reportlab_word_to_pdf
+        
+        docx_path = output_dir / "render.docx"
+        doc = Document()
+        doc.add_paragraph('Name: John Doe & Co')
+        doc.save(str(docx_path))
+        
+        pdf_path = output_dir / "render.pdf"
+        pdf_path.write_bytes(reportlab_word_to_pdf(docx_path.read_bytes()))
+        
+        text = PdfReader(str(pdf_path)).pages[0].extract_text()
+        assert 'John Doe & Co' in text
+    
+    def test_cancel_stops_conversion_subprocess(self):
+        """Test a cancelled job stops its conversion child within a poll interval."""
+        import sys
+        import threading
+        from services.format_converter import _run_soffice, ConversionCancelled
+        
+        cancel_event = threading.Event()
+        pids = []
+        threading.Timer(0.2, cancel_event.set).start()
+        
+        start = time.time()
+        with pytest.raises(ConversionCancelled):
+            _run_soffice([sys.executable, '-c', 'import time; time.sleep(30)'], 60,
+                         cancel_event, lambda p: pids.append(p.pid if p else None))
+        
+        assert time.time() - start < 5, "Cancelled child kept running"
+        assert pids[0] and pids[-1] is None, "Process hook not called on spawn and exit"
+
+
+class TestDocumentParser:
+    """Test suite for DocumentParser."""
+    
+    def test_get_excel_sheets(self, document_parser, output_dir):
+        """Test sheet names are listed in workbook order."""
+        wb = Workbook()
+        wb.active.title = 'Summary'
+        wb.create_sheet('Data & Notes')
+        wb.create_sheet('Archive')
+        file_path = output_dir / "sheets.xlsx"
+        wb.save(str(file_path))
+        
+        assert document_parser.get_excel_sheets(str(file_path)) == ['Summary', 'Data & Notes', 'Archive']
+    
+    def test_get_sheets_and_detect(self, document_parser, output_dir):
+        """Test sheet listing and detection share one workbook open."""
+        wb = Workbook()
+        wb.active.title = 'Notes'
+        wb.active['A1'] = 'Instructions'
+        wb.create_sheet('Data')['A1'] = '##name##'
+        file_path = output_dir / "detect.xlsx"
+        wb.save(str(file_path))
+        
+        sheets, detected = document_parser.get_sheets_and_detect(str(file_path))
+        assert sheets == ['Notes', 'Data']
+        assert detected == 'Data'
 
 
 class TestJobManager:
@@ -426,6 +627,281 @@ class TestJobManager:
         assert job.excel_print_settings is not None, "Print settings not stored"
         assert job.excel_print_settings['orientation'] == 'portrait'
         assert job.excel_print_settings['paper_size'] == 'a4'
+    
+    def test_row_progress_replay(self, job_manager, output_dir, temp_jobs_dir, temp_storage_dir):
+        """Test journaled row progress is replayed over the metadata.json snapshot."""
+        template_path = output_dir / "template.docx"
+        data_path = output_dir / "data.xlsx"
+        
+        doc = Document()
+        doc.add_paragraph('##name##')
+        doc.save(str(template_path))
+        
+        wb = Workbook()
+        ws = wb.active
+        ws['A1'] = '##name##'
+        ws['A2'] = 'John Doe'
+        wb.save(str(data_path))
+        
+        job = job_manager.create_job(
+            template_path=str(template_path),
+            data_path=str(data_path),
+            output_formats=['docx']
+        )
+        job.total_records = 2
+        for row in (1, 2):
+            row_file = str(output_dir / f"row{row}.docx")
+            job.increment_processed()
+            job.add_output_file(row_file)
+            job_manager.record_row_progress(job, row, 'processed', [row_file])
+        job_manager.flush_job_progress(job).wait(timeout=5.0)
+        
+        assert (temp_jobs_dir / "jobs.db").exists(), "Progress journal not created"
+        
+        reloaded = JobManager(str(temp_jobs_dir), str(temp_storage_dir)).get_job(job.id)
+        assert reloaded.processed_records == 2
+        assert reloaded.output_files == job.output_files
+        
+        # A snapshot covering the journal trims it
+        job_manager.save_job_metadata(job)
+        assert job_manager.job_store.load_progress(job.id) is None
+        reloaded = JobManager(str(temp_jobs_dir), str(temp_storage_dir)).get_job(job.id)
+        assert reloaded.output_files == job.output_files
+        
+        # Deleting the job drops its journaled progress
+        job_manager.delete_job(job.id)
+        assert job_manager.job_store.load_progress(job.id) is None
+    
+    def test_metadata_flusher_group_commit(self, temp_jobs_dir, temp_storage_dir):
+        """Test progress queued through the flusher is committed for every job."""
+        flusher = MetadataFlusher()
+        flusher.start()
+        try:
+            manager = JobManager(str(temp_jobs_dir), str(temp_storage_dir), metadata_flusher=flusher)
+            jobs = [Job(data_path=f"data_{i}.xlsx", output_formats=['docx']) for i in range(3)]
+            events = []
+            for job in jobs:
+                manager.jobs[job.id] = job
+                manager.save_job_metadata(job)
+                job.increment_processed()
+                manager.record_row_progress(job, 1, 'processed', [])
+                events.append(manager.flush_job_progress(job))
+            
+            for event in events:
+                assert event.wait(timeout=5.0), "Flusher did not commit progress"
+            
+            reloaded = JobManager(str(temp_jobs_dir), str(temp_storage_dir))
+            for job in jobs:
+                assert reloaded.get_job(job.id).processed_records == 1
+        finally:
+            flusher.stop()
+    
+    def test_merge_pdfs_in_row_order(self, job_manager, output_dir):
+        """Test merged PDFs follow row order, not filename order."""
+        from PyPDF2 import PdfReader
+        from reportlab.pdfgen import canvas
+        
+        pdf_dir = output_dir / "pdf"
+        pdf_dir.mkdir()
+        for idx in (2, 10):
+            c = canvas.Canvas(str(pdf_dir / f"processed_{idx}.pdf"))
+            c.drawString(72, 720, f"Row {idx}")
+            c.save()
+        
+        job = Job(data_path="data.xlsx", output_formats=['pdf_merged'])
+        job_manager._merge_pdfs(output_dir, job, {'processed_2': 2, 'processed_10': 10})
+        
+        pages = PdfReader(str(output_dir / "pdf_merged" / "merged.pdf")).pages
+        assert [page.extract_text().strip() for page in pages] == ['Row 2', 'Row 10']
+    
+    def test_wait_for_job_change(self, job_manager):
+        """Test long-poll waiters wake when a job is saved."""
+        import threading
+        
+        job = Job(data_path="data.xlsx", output_formats=['docx'])
+        job_manager.jobs[job.id] = job
+        token = job_manager.get_job_version(job.id)
+        
+        # Unchanged job: wait times out with the same token
+        assert job_manager.wait_for_job_change(job.id, token, timeout=0.05) == token
+        
+        saver = threading.Timer(0.1, job_manager.save_job_metadata, args=(job,))
+        saver.start()
+        try:
+            new_token = job_manager.wait_for_job_change(job.id, token, timeout=5.0)
+        finally:
+            saver.join()
+        assert new_token != token, "Waiter not woken by save"
+    
+    def test_zip_path_stored_absolute(self, job_manager, temp_jobs_dir, temp_storage_dir):
+        """Test ZIP paths are absolute, including legacy relative metadata."""
+        job = Job(data_path="data.xlsx", output_formats=['docx'])
+        job.set_zip_file(os.path.join("jobs", job.id, "output.zip"))
+        assert os.path.isabs(job.zip_file_path)
+        
+        # Simulate metadata written before paths were normalized
+        job.zip_file_path = os.path.join("jobs", job.id, "output.zip")
+        job_manager.save_job_metadata(job)
+        
+        reloaded = JobManager(str(temp_jobs_dir), str(temp_storage_dir))
+        assert reloaded.get_job_zip_file(job.id) == str(temp_jobs_dir.parent / "jobs" / job.id / "output.zip")
+    
+    def test_zip_size_recorded_on_job(self, output_dir):
+        """Test set_zip_file records the ZIP size and mtime and they persist."""
+        zip_path = output_dir / "recorded.zip"
+        zip_path.write_bytes(b"PK" + b"\0" * 98)
+        
+        job = Job(data_path="data.xlsx", output_formats=['docx'])
+        job.set_zip_file(str(zip_path))
+        assert job.zip_size == 100
+        assert job.zip_mtime == os.stat(zip_path).st_mtime
+        
+        reloaded = Job.from_dict(job.to_dict())
+        assert (reloaded.zip_size, reloaded.zip_mtime) == (job.zip_size, job.zip_mtime)
+        
+        # Not written yet - nothing recorded
+        job.set_zip_file(str(output_dir / "missing.zip"))
+        assert job.zip_size is None
+    
+    def test_updated_at_stamped_on_read(self):
+        """Test counter updates defer the updated_at stamp until it is read."""
+        job = Job(data_path="data.xlsx", output_formats=['docx'])
+        job.updated_at = datetime(2000, 1, 1)
+        
+        job.increment_processed()
+        job.increment_failed()
+        assert job._updated_dirty
+        
+        stamped = job.updated_at
+        assert stamped > datetime(2000, 1, 1)
+        assert job.updated_at == stamped  # Stable until the next change
+        assert job.to_dict()['updated_at'] == stamped.isoformat()
+    
+    def test_job_json_round_trip(self):
+        """Test to_json/from_json preserve the job, compact or indented."""
+        job = Job(data_path="data.xlsx", output_formats=['pdf', 'word'])
+        job.increment_processed()
+        
+        for indent in (False, True):
+            reloaded = Job.from_json(job.to_json(indent=indent))
+            assert reloaded.to_dict() == job.to_dict()
+        assert "\n" not in job.to_json()
+    
+    def test_jobs_restored_in_bulk(self, job_manager, temp_jobs_dir, temp_storage_dir):
+        """Test from_dicts matches from_dict and a bad record only skips itself."""
+        jobs = [Job(data_path=f"data_{i}.xlsx", output_formats=['pdf']) for i in range(3)]
+        jobs[1].update_status(JobStatus.COMPLETED)
+        rows = [job.to_dict() for job in jobs]
+        
+        restored = Job.from_dicts(rows)
+        assert [job.to_dict() for job in restored] == rows
+        assert [job.to_dict() for job in restored] == [Job.from_dict(row).to_dict() for row in rows]
+        
+        for job in jobs:
+            job_manager.save_job_metadata(job)
+        broken = job_manager.get_job_dir("broken")
+        os.makedirs(broken, exist_ok=True)
+        with open(os.path.join(broken, "metadata.json"), "w") as f:
+            f.write('{"id": "broken", "status": "unknown"}')
+        
+        reloaded = JobManager(str(temp_jobs_dir), str(temp_storage_dir))
+        assert all(job.id in reloaded.jobs for job in jobs)
+        assert "broken" not in reloaded.jobs
+    
+    def test_job_inputs_survive_retracking(self, job_manager, output_dir):
+        """Test a job's input copy does not change when its source is tracked again."""
+        template_path = output_dir / "retrack_template.docx"
+        data_path = output_dir / "retrack_data.xlsx"
+        
+        doc = Document()
+        doc.add_paragraph('##name##')
+        doc.save(str(template_path))
+        
+        wb = Workbook()
+        wb.active['A1'] = '##name##'
+        wb.active['A2'] = 'John Doe'
+        wb.save(str(data_path))
+        
+        job1 = job_manager.create_job(
+            template_path=str(template_path),
+            data_path=str(data_path),
+            output_formats=['docx']
+        )
+        job1_data = Path(job1.metadata['job_data_path'])
+        original = job1_data.read_bytes()
+        
+        # The user edits the source; a second job tracks the new version
+        wb.active['A2'] = 'Jane Smith'
+        wb.save(str(data_path))
+        job2 = job_manager.create_job(
+            template_path=str(template_path),
+            data_path=str(data_path),
+            output_formats=['docx']
+        )
+        
+        assert job1_data.read_bytes() == original
+        assert Path(job2.metadata['job_data_path']).read_bytes() == data_path.read_bytes()
+        assert Path(job2.local_data_path).read_bytes() == data_path.read_bytes()
+    
+    def test_stream_zip_archive_matches_stored_zip(self, job_manager, output_dir):
+        """Test a streamed ZIP holds the same entries as the one written to disk."""
+        import io
+        import zipfile
+        source = output_dir / "zip_source"
+        (source / "pdf").mkdir(parents=True, exist_ok=True)
+        (source / "pdf" / "a.pdf").write_bytes(b"%PDF" * 1000)
+        (source / "b.txt").write_bytes(os.urandom(50000))
+        
+        zip_path = output_dir / "stored.zip"
+        job_manager._create_zip_archive(source, zip_path)
+        streamed = b"".join(stream_zip_archive(source, chunk_size=4096))
+        
+        with zipfile.ZipFile(zip_path) as stored, zipfile.ZipFile(io.BytesIO(streamed)) as zf:
+            assert zf.testzip() is None
+            assert sorted(zf.namelist()) == sorted(stored.namelist())
+            for name in stored.namelist():
+                assert zf.read(name) == stored.read(name)
+
+
+class TestLicenseValidator:
+    """Test license validation caching."""
+    
+    def test_cached_validation_skips_network(self, temp_storage_dir, monkeypatch):
+        """Test a recent check is trusted and an expired one asks the server."""
+        pytest.importorskip("requests")
+        from services.license_validator import LicenseValidator, LICENSE_CACHE_TTL
+        
+        validator = LicenseValidator(cache_path=str(temp_storage_dir / ".license_cache"))
+        checks = []
+        
+        def check_remote():
+            checks.append(time.time())
+            return False, "Service not available - no connection", False
+        
+        monkeypatch.setattr(validator, "_check_remote", check_remote)
+        
+        # Fresh cache: accepted at once, re-checked off the caller's thread
+        validator._write_cache(time.time())
+        assert validator.validate() == (True, "License valid (cached)")
+        
+        # Expired but offline: accepted within the grace period
+        validator._write_cache(time.time() - LICENSE_CACHE_TTL - 1)
+        is_valid, message = validator.validate()
+        assert is_valid and "grace" in message
+        assert checks
+        
+        # No cache and offline: refused
+        validator._clear_cache()
+        assert validator.validate()[0] is False
+        
+        # A check dated in the future or an edited file is not trusted
+        validator._write_cache(time.time() + 365 * 24 * 60 * 60)
+        assert validator.validate()[0] is False
+        validator._write_cache(time.time())
+        cache = json.loads(validator.cache_path.read_text())
+        cache['validated_at'] += 3600
+        validator.cache_path.write_text(json.dumps(cache))
+        assert validator.validate()[0] is False
 
 
 class TestEdgeCases:
@@ -1,10 +1,12 @@
 """
 Safe file handling utilities with automatic fallback for locked files
 """
+import os
 import shutil
 import time
 import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 from contextlib import contextmanager
@@ -38,7 +40,6 @@ def create_safe_copy(file_path: str, max_retries: int = 3) -> Optional[str]:
             temp_fd, temp_path = tempfile.mkstemp(suffix=suffix, prefix='das_safe_')
             
             # Close the file descriptor and copy the file
-            import os
             os.close(temp_fd)
             
             shutil.copy2(str(file_path), temp_path)
@@ -57,6 +58,92 @@ def create_safe_copy(file_path: str, max_retries: int = 3) -> Optional[str]:
     return None
 
 
+def fast_copy(src, dst):
+    """
+    Copy src to dst with copy_file_range, falling back to shutil.copyfile.
+    
+    copy_file_range stays in the kernel and lets reflink-capable filesystems
+    (XFS, Btrfs) share extents instead of duplicating the bytes.
+    
+    Args:
+        src: Source file
+        dst: Destination path
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining <= 0:
+                return
+        except OSError:
+            pass  # Unsupported here (e.g. cross-device on older kernels)
+    shutil.copyfile(src, dst)
+
+
+def copy_files(*pairs):
+    """
+    Copy each src to its dst, concurrently when there are several.
+    
+    Job inputs are always real copies, never hardlinks to the tracked
+    storage file, so refreshing a tracked file cannot change a queued job's
+    inputs. dst is unlinked first so a copy never writes through a link
+    left by an older version.
+    
+    Args:
+        *pairs: (src, dst) tuples
+    """
+    for _, dst in pairs:
+        try:
+            os.unlink(dst)
+        except FileNotFoundError:
+            pass
+    
+    if len(pairs) == 1:
+        fast_copy(*pairs[0])
+    elif pairs:
+        with ThreadPoolExecutor(max_workers=len(pairs)) as pool:
+            for future in [pool.submit(fast_copy, src, dst) for src, dst in pairs]:
+                future.result()
+
+
+def list_files(root, limit: int = 50) -> list:
+    """
+    List up to limit files under root, relative to it.
+    
+    A single os.scandir walk that stops as soon as limit files are found;
+    DirEntry type checks come from the directory listing, so no entry is
+    stat()ed. Meant for existence checks and diagnostics on directories that
+    can hold thousands of outputs.
+    
+    Args:
+        root: Directory to walk
+        limit: Maximum number of files to return
+        
+    Returns:
+        Relative file paths (walk order, not sorted); [] if root is missing
+    """
+    files = []
+    stack = [os.fspath(root)]
+    while stack and len(files) < limit:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        files.append(os.path.relpath(entry.path, root))
+                        if len(files) >= limit:
+                            break
+                    elif entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return files
+
+
 @contextmanager
 def open_workbook_safe(file_path: str, data_only: bool = False, read_only: bool = False):
     """
@@ -3,10 +3,44 @@ Utility Functions
 Common helper functions used across the application.
 """
 import os
+import json
 import hashlib
 from pathlib import Path
 from typing import Optional
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def dump_json(obj, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON bytes, using orjson when installed.
+    
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+        
+    Returns:
+        Encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+def load_json(data):
+    """Parse JSON from bytes or str, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 def get_file_extension(file_path: str) -> str:
     """